@@ -0,0 +1,271 @@
+"""Offline stand-in for PokeAPI used by the benchmark harness.
+
+Serves a deterministic synthetic dataset (or fixtures written with --dump)
+under /api/v2/ with the same URL layout and JSON shape as pokeapi.co, plus
+configurable latency and error injection. Point the app at it with
+POKEAPI_BASE_URL=http://127.0.0.1:<port>/api/v2.
+
+    python -m bench.fake_pokeapi --port 8765 --count 1300 --latency 40 --error-rate 0.01
+    python -m bench.fake_pokeapi --dump bench/fixtures --count 1300
+    python -m bench.fake_pokeapi --fixtures bench/fixtures
+
+GET /__stats returns request counters, POST /__reset clears them.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+TYPE_CHART = {
+    # defending type: (double_damage_from, half_damage_from, no_damage_from)
+    "normal": (["fighting"], [], ["ghost"]),
+    "fire": (["water", "ground", "rock"], ["fire", "grass", "ice", "bug", "steel", "fairy"], []),
+    "water": (["electric", "grass"], ["fire", "water", "ice", "steel"], []),
+    "electric": (["ground"], ["electric", "flying", "steel"], []),
+    "grass": (["fire", "ice", "poison", "flying", "bug"], ["water", "electric", "grass", "ground"], []),
+    "ice": (["fire", "fighting", "rock", "steel"], ["ice"], []),
+    "fighting": (["flying", "psychic", "fairy"], ["bug", "rock", "dark"], []),
+    "poison": (["ground", "psychic"], ["grass", "fighting", "poison", "bug", "fairy"], []),
+    "ground": (["water", "grass", "ice"], ["poison", "rock"], ["electric"]),
+    "flying": (["electric", "ice", "rock"], ["grass", "fighting", "bug"], ["ground"]),
+    "psychic": (["bug", "ghost", "dark"], ["fighting", "psychic"], []),
+    "bug": (["fire", "flying", "rock"], ["grass", "fighting", "ground"], []),
+    "rock": (["water", "grass", "fighting", "ground", "steel"], ["normal", "fire", "poison", "flying"], []),
+    "ghost": (["ghost", "dark"], ["poison", "bug"], ["normal", "fighting"]),
+    "dragon": (["ice", "dragon", "fairy"], ["fire", "water", "electric", "grass"], []),
+    "dark": (["fighting", "bug", "fairy"], ["ghost", "dark"], ["psychic"]),
+    "steel": (["fire", "fighting", "ground"],
+              ["normal", "grass", "ice", "flying", "psychic", "bug", "rock", "dragon", "steel", "fairy"], ["poison"]),
+    "fairy": (["poison", "steel"], ["fighting", "bug", "dark"], ["dragon"]),
+}
+TYPES = list(TYPE_CHART)
+STATS = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+SYLLABLES = ["pi", "ka", "chu", "bul", "ba", "saur", "char", "zard", "squir", "tle", "ee", "vee",
+             "mew", "two", "gen", "gar", "drago", "nite", "snor", "lax", "lu", "cario", "tog", "epi"]
+
+def _name(i):
+    rnd = random.Random(i)
+    return "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 3))) + f"-{i}"
+
+def synthesize(count=1300, abilities=300):
+    # {path: document} for a deterministic PokeAPI-shaped dataset; paths are
+    # relative to /api/v2/ without slashes at either end.
+    docs = {}
+    names = ["bulbasaur", "ivysaur", "venusaur", "charmander", "charmeleon", "charizard",
+             "squirtle", "wartortle", "blastoise"] + [_name(i) for i in range(10, count + 1)]
+    names = names[:count]
+    names[24:25] = ["pikachu"] if count >= 25 else []
+    by_type, by_ability = {t: [] for t in TYPES}, {}
+    for i, name in enumerate(names, 1):
+        rnd = random.Random(i * 7919)
+        types = rnd.sample(TYPES, rnd.choice((1, 1, 2)))
+        abs_ = [f"ability-{rnd.randrange(abilities)}" for _ in range(rnd.randint(1, 3))]
+        abs_ = list(dict.fromkeys(abs_))
+        ref = {"name": name, "url": f"/pokemon/{i}/"}
+        for t in types:
+            by_type[t].append({"pokemon": ref, "slot": 1})
+        for a in abs_:
+            by_ability.setdefault(a, []).append({"pokemon": ref, "is_hidden": False})
+        art = f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/{i}.png"
+        docs[f"pokemon/{i}"] = {
+            "id": i, "name": name, "height": rnd.randint(1, 40), "weight": rnd.randint(10, 3000),
+            "base_experience": rnd.randint(40, 300), "order": i, "is_default": True,
+            "sprites": {
+                "front_default": f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{i}.png",
+                "back_default": None, "front_shiny": None, "back_shiny": None,
+                "other": {"official-artwork": {"front_default": art, "front_shiny": None},
+                          "home": {"front_default": None}, "dream_world": {"front_default": None}},
+                "versions": {f"generation-{g}": {"front_default": None} for g in range(1, 9)},
+            },
+            "types": [{"slot": k, "type": {"name": t, "url": f"/type/{t}/"}} for k, t in enumerate(types, 1)],
+            "abilities": [{"slot": k, "is_hidden": k == 3, "ability": {"name": a, "url": f"/ability/{a}/"}}
+                          for k, a in enumerate(abs_, 1)],
+            "stats": [{"base_stat": rnd.randint(20, 160), "effort": 0, "stat": {"name": s, "url": f"/stat/{k}/"}}
+                      for k, s in enumerate(STATS, 1)],
+            "species": {"name": name, "url": f"/pokemon-species/{i}/"},
+            "moves": [{"move": {"name": f"move-{rnd.randrange(900)}", "url": "/move/1/"},
+                       "version_group_details": [{"level_learned_at": rnd.randrange(60),
+                                                  "move_learn_method": {"name": "level-up"},
+                                                  "version_group": {"name": "red-blue"}}] * 3}
+                      for _ in range(rnd.randint(20, 90))],
+            "game_indices": [{"game_index": i, "version": {"name": f"version-{v}"}} for v in range(20)],
+        }
+        chain_id = (i - 1) // 3 + 1
+        docs[f"pokemon-species/{i}"] = {
+            "id": i, "name": name,
+            "flavor_text_entries": [
+                {"flavor_text": f"{name.title()} is Pokémon\nnumber {i}.", "language": {"name": "en"}},
+                {"flavor_text": f"{name.title()} est le Pokémon {i}.", "language": {"name": "fr"}},
+            ],
+            "evolution_chain": {"url": f"/evolution-chain/{chain_id}/"},
+        }
+    for chain_id in range(1, (len(names) + 2) // 3 + 1):
+        members = [i for i in range(3 * chain_id - 2, 3 * chain_id + 1) if i <= len(names)]
+        node = None
+        for i in reversed(members):
+            node = {"species": {"name": names[i - 1], "url": f"/pokemon-species/{i}/"},
+                    "evolution_details": [] if i == members[0] else
+                    [{"trigger": {"name": "level-up"}, "min_level": 16 if i == members[1] else 36}],
+                    "evolves_to": [node] if node else []}
+        docs[f"evolution-chain/{chain_id}"] = {"id": chain_id, "chain": node}
+    docs["pokemon"] = {"count": len(names), "results": [{"name": n, "url": f"/pokemon/{i}/"} for i, n in enumerate(names, 1)]}
+    docs["type"] = {"count": len(TYPES), "results": [{"name": t, "url": f"/type/{t}/"} for t in TYPES]}
+    for k, (double, half, none) in TYPE_CHART.items():
+        docs[f"type/{k}"] = {
+            "id": TYPES.index(k) + 1, "name": k, "pokemon": by_type[k],
+            "damage_relations": {
+                "double_damage_from": [{"name": x} for x in double],
+                "half_damage_from": [{"name": x} for x in half],
+                "no_damage_from": [{"name": x} for x in none],
+                "double_damage_to": [], "half_damage_to": [], "no_damage_to": [],
+            },
+        }
+    ability_names = sorted(by_ability)
+    docs["ability"] = {"count": len(ability_names), "results": [{"name": a, "url": f"/ability/{a}/"} for a in ability_names]}
+    for a in ability_names:
+        docs[f"ability/{a}"] = {"name": a, "pokemon": by_ability[a]}
+    return docs
+
+def load_fixtures(root):
+    root = Path(root)
+    return {str(p.relative_to(root).with_suffix("")): json.loads(p.read_text()) for p in root.rglob("*.json")}
+
+def dump_fixtures(docs, root):
+    root = Path(root)
+    for path, doc in docs.items():
+        target = root / (path + ".json")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(json.dumps(doc))
+
+class FakePokeAPI:
+    PAGINATED = {"pokemon", "type", "ability"}
+    ALIASED = re.compile(r"^(pokemon|pokemon-species)/([a-z][\w-]*)$")
+
+    def __init__(self, docs, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, throttle_rate=0.0, seed=0):
+        self.docs = docs
+        self.ids = {e["name"]: e["url"].strip("/").split("/")[-1] for e in docs.get("pokemon", {}).get("results", [])}
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.counts = Counter()
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+    def resolve(self, path):
+        path = path.strip("/")
+        m = self.ALIASED.match(path)
+        if m and m.group(2) in self.ids:
+            path = f"{m.group(1)}/{self.ids[m.group(2)]}"
+        return self.docs.get(path)
+
+    def handle(self, raw_path, base):
+        # Returns (status, headers, body bytes).
+        url = urlparse(raw_path)
+        if not url.path.startswith("/api/v2/"):
+            return 404, {}, b"Not Found"
+        path = url.path[len("/api/v2/"):].strip("/")
+        with self.lock:
+            self.counts["requests"] += 1
+            self.counts[path.split("/")[0]] += 1
+            roll = self.random.random()
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if roll < self.throttle_rate:
+            with self.lock:
+                self.counts["throttled"] += 1
+            return 429, {"Retry-After": "1"}, b"Too Many Requests"
+        if roll < self.throttle_rate + self.error_rate:
+            with self.lock:
+                self.counts["errors"] += 1
+            return 503, {}, b"Service Unavailable"
+        doc = self.resolve(path)
+        if doc is None:
+            return 404, {}, b"Not Found"
+        if path in self.PAGINATED:
+            query = parse_qs(url.query)
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", ["20"])[0])
+            doc = dict(doc, results=doc["results"][offset:offset + limit])
+        body = json.dumps(doc).replace('"url": "/', f'"url": "{base}/').encode()
+        with self.lock:
+            self.bytes_sent += len(body)
+        return 200, {"Content-Type": "application/json"}, body
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, bytes_sent=self.bytes_sent)
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+            self.bytes_sent = 0
+
+def make_server(api, host="127.0.0.1", port=8765):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, headers, body):
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/__stats":
+                return self._send(200, {"Content-Type": "application/json"}, json.dumps(api.stats()).encode())
+            base = f"http://{self.headers.get('Host', f'{host}:{port}')}/api/v2"
+            self._send(*api.handle(self.path, base))
+
+        def do_POST(self):
+            if self.path == "/__reset":
+                api.reset()
+                return self._send(204, {}, b"")
+            self._send(405, {}, b"")
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--count", type=int, default=1300, help="Number of synthetic Pokémon.")
+    parser.add_argument("--fixtures", help="Serve fixtures from this directory instead of synthetic data.")
+    parser.add_argument("--dump", help="Write the synthetic dataset to this directory and exit.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per request (ms).")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency up to this many ms.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction answered with 429 + Retry-After.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    docs = load_fixtures(args.fixtures) if args.fixtures else synthesize(args.count)
+    if args.dump:
+        dump_fixtures(docs, args.dump)
+        print(f"wrote {len(docs)} documents to {args.dump}")
+        return
+    api = FakePokeAPI(docs, args.latency, args.jitter, args.error_rate, args.throttle_rate, args.seed)
+    server = make_server(api, args.host, args.port)
+    print(f"fake PokeAPI on http://{args.host}:{args.port}/api/v2 ({len(docs)} documents)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Benchmark the Pokédex endpoints against the offline PokeAPI stand-in.
+
+Starts bench.fake_pokeapi in a subprocess, points the app at it and drives
+each scenario through Django's test client, cold (all caches emptied) and
+then warm. Reports throughput, latency percentiles, upstream calls and
+bytes, CPU per request and peak RSS.
+
+    python -m bench.run
+    python -m bench.run --requests 200 --concurrency 16 --latency 40 --json bench_output.json
+    python -m bench.run --scenarios index,search --upstream http://127.0.0.1:8765
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_upstream(args):
+    port = _free_port()
+    cmd = [sys.executable, "-m", "bench.fake_pokeapi", "--port", str(port), "--count", str(args.count),
+           "--latency", str(args.latency), "--jitter", str(args.jitter), "--error-rate", str(args.error_rate)]
+    if args.fixtures:
+        cmd += ["--fixtures", args.fixtures]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    proc.stdout.readline()
+    return proc, f"http://127.0.0.1:{port}"
+
+def upstream_stats(upstream):
+    with urllib.request.urlopen(f"{upstream}/__stats") as resp:
+        return json.loads(resp.read())
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def scenarios(names, rnd, n, page_size):
+    teams = lambda: ",".join(rnd.sample(names[:400], 6))
+    pages = max(1, min(len(names) // page_size, 20))
+    queries = ["a", "ka", "saur", "chu", "gar", "zard", "ee", "pika", "mew", "lu"]
+    return {
+        "index": [f"/api/pokemon/?page={rnd.randint(1, pages)}&page_size={page_size}" for _ in range(n)],
+        "detail": [f"/api/pokemon/{rnd.choice(names[:300])}/" for _ in range(n)],
+        "search": [f"/api/pokemon/?q={rnd.choice(queries)}&page_size={page_size}" for _ in range(n)],
+        "coverage": [f"/api/coverage/?team={teams()}" for _ in range(n)],
+        "average": [f"/api/average/?team={teams()}" for _ in range(n)],
+    }
+
+def clear_caches():
+    from django.core.cache import caches
+    from pokedex import search, typechart
+    from pokedex.tiered_cache import get_tier
+    for alias in caches:
+        caches[alias].clear()
+    get_tier().lru.clear()
+    search.reset()
+    typechart.reset()
+
+def drive(urls, concurrency):
+    from django.test import Client
+    clients = {}
+
+    def one(url):
+        import threading
+        client = clients.setdefault(threading.get_ident(), Client())
+        t0 = time.perf_counter()
+        resp = client.get(url)
+        body = b"".join(resp.streaming_content) if getattr(resp, "streaming", False) else resp.content
+        return time.perf_counter() - t0, resp.status_code, len(body)
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, urls))
+    return results, time.perf_counter() - wall0, time.process_time() - cpu0
+
+def run_phase(name, phase, urls, args, upstream):
+    urllib.request.urlopen(urllib.request.Request(f"{upstream}/__reset", method="POST")).close()
+    results, wall, cpu = drive(urls, args.concurrency)
+    latencies = [r[0] * 1000 for r in results]
+    up = upstream_stats(upstream)
+    return {
+        "scenario": name, "phase": phase, "requests": len(urls),
+        "errors": sum(1 for r in results if r[1] >= 400),
+        "throughput_rps": round(len(urls) / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "cpu_ms_per_req": round(cpu * 1000 / len(urls), 3) if urls else 0.0,
+        "upstream_calls": up.get("requests", 0),
+        "upstream_kb": round(up.get("bytes_sent", 0) / 1024, 1),
+        "response_kb": round(sum(r[2] for r in results) / 1024, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def print_table(rows):
+    cols = ["scenario", "phase", "requests", "errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms",
+            "cpu_ms_per_req", "upstream_calls", "upstream_kb", "peak_rss_mb"]
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in cols))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default="index,detail,search,coverage,average")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario and phase.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=24)
+    parser.add_argument("--count", type=int, default=1300, help="Synthetic catalog size.")
+    parser.add_argument("--fixtures", help="Fixture directory for the fake upstream.")
+    parser.add_argument("--latency", type=float, default=20.0, help="Fake upstream latency (ms).")
+    parser.add_argument("--jitter", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream", help="Use an already running fake PokeAPI at this origin.")
+    parser.add_argument("--catalog", action="store_true", help="Allow the local SQLite catalog (off by default).")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    proc = None
+    upstream = args.upstream
+    if not upstream:
+        proc, upstream = start_upstream(args)
+    try:
+        os.environ["POKEAPI_BASE_URL"] = f"{upstream}/api/v2"
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pokedex_project.settings")
+        os.environ["LOCAL_CATALOG"] = "1" if args.catalog else "0"
+        os.environ.setdefault("ALLOWED_HOSTS", "*")
+        os.environ.setdefault("METRICS_LOG_LEVEL", "WARNING")
+        os.environ["SNAPSHOT_PATH"] = ""
+        os.environ.setdefault("UPSTREAM_RATE", "0")
+        sys.path.insert(0, str(ROOT))
+        import warnings
+        warnings.filterwarnings("ignore", module="django.core.cache")
+        import django
+        django.setup()
+        with urllib.request.urlopen(f"{upstream}/api/v2/pokemon/?limit=100000") as resp:
+            names = [e["name"] for e in json.loads(resp.read())["results"]]
+
+        plan = scenarios(names, random.Random(args.seed), args.requests, args.page_size)
+        rows = []
+        for name in args.scenarios.split(","):
+            clear_caches()
+            for phase in ("cold", "warm"):
+                rows.append(run_phase(name, phase, plan[name], args, upstream))
+        print_table(rows)
+        if args.json:
+            Path(args.json).write_text(json.dumps(rows, indent=2))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,10 @@
 from django.contrib import admin
+from .models import Ability, Pokemon, Type
+
+@admin.register(Pokemon)
+class PokemonAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "species", "height", "weight")
+    search_fields = ("name",)
+
+admin.site.register(Type)
+admin.site.register(Ability)
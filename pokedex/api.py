@@ -1,86 +1,222 @@
-from django.http import JsonResponse
-from django.views.decorators.http import require_GET
+import csv
+import io
+import json
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
 from django.conf import settings
-from . import services
+from . import jsonenc, metrics, resultsets, search, services, teams as team_analytics, warmup
+from .response_cache import cache_response
+from .scheduler import get_scheduler
+from .tiered_cache import get_tier
 
-def _card(p):
-    image = p.get("sprites", {}).get("other", {}).get("official-artwork", {}).get("front_default") or             p.get("sprites", {}).get("front_default")
-    return {
-        "id": p.get("id"),
-        "name": p.get("name"),
-        "image": image,
-        "types": [t["type"]["name"] for t in p.get("types", [])],
-        "height": p.get("height"),
-        "weight": p.get("weight"),
-        "stats": { s["stat"]["name"]: s["base_stat"] for s in p.get("stats", []) },
-    }
+CARD_FIELDS = ("id", "name", "image", "types", "height", "weight", "stats", "abilities")
+
+def _card(card, fields=None):
+    # Full list payload, or only `fields` (see _fields) for sparse responses.
+    if fields is None:
+        return card.as_dict()
+    out = {}
+    for f in fields:
+        v = getattr(card, f)
+        out[f] = dict(v) if f == "stats" else list(v) if f in ("types", "abilities") else v
+    return out
+
+def _card_json(card, fields=None):
+    return card.json() if fields is None else jsonenc.dumps(_card(card, fields))
+
+def _fields(raw):
+    # `fields=name,image` (or a JSON list) -> tuple of card fields; None = all.
+    if not raw:
+        return None
+    if not isinstance(raw, (str, list)):
+        raise ValueError("fields must be a comma-separated string or a list")
+    fields = [str(f).strip() for f in (raw if isinstance(raw, list) else raw.split(",")) if str(f).strip()]
+    unknown = [f for f in fields if f not in CARD_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (choose from {', '.join(CARD_FIELDS)})")
+    return tuple(dict.fromkeys(fields)) or None
+
+def _raw(body, status=200):
+    # `body` is encoded JSON (see jsonenc).
+    return HttpResponse(body, status=status, content_type="application/json")
 
 def _ok(data, status=200):
-    return JsonResponse(data, status=status)
+    return _raw(jsonenc.dumps(data), status=status)
 
 def _err(message, status=502, hint=None):
     payload = {"error": message}
     if hint:
         payload["hint"] = hint
-    return JsonResponse(payload, status=status)
+    return _ok(payload, status=status)
+
+def _not_ready(e):
+    response = _err(str(e), status=503, hint="Try again shortly.")
+    response["Retry-After"] = str(e.retry_after)
+    return response
+
+def _flavor(species):
+    for ft in species.get("flavor_text_entries", []):
+        if ft.get("language", {}).get("name") == "en":
+            return ft.get("flavor_text", "").replace("\n", " ").replace("\f", " ")
+    return ""
+
+def _detail_payload(card, species, evo):
+    return {
+        "pokemon": _card(card) | {"abilities": list(card.abilities)},
+        "species": {"name": species.get("name"), "flavor_text": _flavor(species)},
+        "evolution": {"names": services.evo_chain_names(evo)},
+    }
+
+def _evolution_payload(evo):
+    return {
+        "names": services.evo_chain_names(evo),
+        "stages": [list(s) for s in evo.stages] if evo else [],
+        "triggers": evo.as_dict()["triggers"] if evo else [],
+    }
+
+def _search_mode(request):
+    mode = request.GET.get("match", "substring")
+    if mode not in search.MODES:
+        raise ValueError(f"match must be one of: {', '.join(search.MODES)}")
+    return mode
+
+def _list_request(request):
+    # (filters, offset, page_size) from a `cursor` token, or from the filter
+    # and page parameters. Type, ability and name query combine.
+    cursor = request.GET.get("cursor")
+    if cursor:
+        return resultsets.decode_cursor(cursor)
+    q = request.GET.get("q")
+    filters = services.search_filters(request.GET.get("type"), request.GET.get("ability"), q,
+                                      _search_mode(request) if q else "substring")
+    try:
+        page = max(int(request.GET.get("page", "1")), 1)
+        page_size = max(int(request.GET.get("page_size", settings.PAGE_SIZE)), 1)
+    except ValueError:
+        raise ValueError("page and page_size must be integers")
+    return filters, (page - 1) * page_size, page_size
+
+def _list_body(data, filters, offset, page_size, fields=None):
+    end = offset + page_size
+    return jsonenc.obj({
+        "count": data["count"],
+        "results": jsonenc.array(_card_json(c, fields) for c in data["results"]),
+        "next": resultsets.encode_cursor(filters, end, page_size) if end < data["count"] else None,
+    })
 
 @require_GET
+@cache_response
 def pokemon_index(request):
     try:
-        q = request.GET.get("q")
-        type_name = request.GET.get("type")
-        ability_name = request.GET.get("ability")
-        page = int(request.GET.get("page", "1"))
-        page_size = int(request.GET.get("page_size", settings.PAGE_SIZE))
-
-        if type_name:
-            data = services.filter_pokemon_by_type(type_name, page=page, page_size=page_size)
-            return _ok({"count": data["count"], "results": [_card(p) for p in data["results"]]})
-
-        if ability_name:
-            data = services.filter_pokemon_by_ability(ability_name, page=page, page_size=page_size)
-            return _ok({"count": data["count"], "results": [_card(p) for p in data["results"]]})
-
-        if q:
-            data = services.search_pokemon(q, page=page, page_size=page_size)
-            return _ok({"count": data["count"], "results": [_card(p) for p in data["results"]]})
-
-        offset = (page-1) * page_size
-        data = services.list_pokemon(offset=offset, limit=page_size)
-        enriched = []
-        for item in data.get("results", []):
-            try:
-                enriched.append(_card(services.get_pokemon(item["name"])))
-            except Exception:
-                pass
-        return _ok({"count": data.get("count", 0), "results": enriched})
+        filters, offset, page_size = _list_request(request)
+        fields = _fields(request.GET.get("fields"))
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        data = services.find_pokemon(offset=offset, limit=page_size, **filters)
+        return _raw(_list_body(data, filters, offset, page_size, fields))
     except services.PokeAPIError as e:
         return _err(str(e), hint="The Pokémon escaped our request. Try again.")
     except Exception as e:
         return _err(f"Unexpected error: {e}", status=500)
 
 @require_GET
+@warmup.tracks_popularity
+@cache_response
 def pokemon_detail(request, identifier):
     try:
-        p = services.get_pokemon(identifier)
+        card = services.get_card(identifier)
         species = services.get_pokemon_species(identifier)
         evo = services.get_evolution_chain_by_pokemon(identifier)
-        evo_names = services.evo_chain_names(evo)
-        flavor = ""
-        for ft in species.get("flavor_text_entries", []):
-            if ft.get("language", {}).get("name") == "en":
-                flavor = ft.get("flavor_text", "").replace("\n", " ").replace("\f", " ")
-                break
-        return _ok({
-            "pokemon": _card(p) | {"abilities": [a["ability"]["name"] for a in p.get("abilities", [])]},
-            "species": {"name": species.get("name"), "flavor_text": flavor},
-            "evolution": {"names": evo_names},
-        })
+        return _ok(_detail_payload(card, species, evo))
     except services.PokeAPIError as e:
         return _err(str(e), hint="Double-check the name or ID.")
     except Exception as e:
         return _err(f"Unexpected error: {e}", status=500)
 
+SIMILAR_MAX = 50
+
+def _similar_params(request):
+    try:
+        k = int(request.GET.get("k", "10"))
+    except ValueError:
+        raise ValueError("k must be an integer")
+    if not 1 <= k <= SIMILAR_MAX:
+        raise ValueError(f"k must be between 1 and {SIMILAR_MAX}")
+    types = [t.strip().lower() for v in request.GET.getlist("type") for t in v.split(",") if t.strip()]
+    return k, types
+
+def _similar_body(card, found):
+    return jsonenc.obj({
+        "pokemon": card.name,
+        "results": jsonenc.array(jsonenc.extend(c.json(), {"distance": d}) for c, d in found),
+    })
+
+@require_GET
+@cache_response
+def similar_api(request, identifier):
+    try:
+        k, types = _similar_params(request)
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        card, found = services.similar_pokemon(identifier, k, types)
+        return _raw(_similar_body(card, found))
+    except services.NotReadyError as e:
+        return _not_ready(e)
+    except services.PokeAPIError as e:
+        return _err(str(e), hint="Double-check the name or ID.")
+    except Exception as e:
+        return _err(f"Unexpected error: {e}", status=500)
+
+def _batch_request(request):
+    # (identifiers, fields) from ?ids=1,pikachu&fields=... or a JSON body
+    # {"ids": [...], "fields": [...]}. Identifiers are deduplicated in order
+    # as given; _batch_body drops those that resolve to a Pokémon already
+    # listed (e.g. 1 and "bulbasaur").
+    if request.method == "POST":
+        body = json.loads(request.body or b"{}")
+        if not isinstance(body, dict) or not isinstance(body.get("ids", []), list):
+            raise ValueError("Body must be {\"ids\": [...], \"fields\": [...]}")
+        ids, fields = body.get("ids", []), body.get("fields")
+    else:
+        ids = [x for v in request.GET.getlist("ids") for x in v.split(",")]
+        fields = request.GET.get("fields")
+    ids = list(dict.fromkeys(str(x).strip().lower() for x in ids if str(x).strip()))
+    if not ids:
+        raise ValueError("Provide ids")
+    limit = getattr(settings, "POKEMON_BATCH_LIMIT", 500)
+    if len(ids) > limit:
+        raise ValueError(f"At most {limit} ids per request")
+    return ids, _fields(fields)
+
+def _batch_body(ids, cards, fields):
+    found, seen = [], set()
+    for i in ids:
+        card = cards.get(i)
+        if card is not None and card.id not in seen:
+            seen.add(card.id)
+            found.append(card)
+    return jsonenc.obj({
+        "count": len(found),
+        "results": jsonenc.array(_card_json(c, fields) for c in found),
+        "missing": [i for i in ids if i not in cards],
+    })
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@cache_response
+def batch_api(request):
+    try:
+        ids, fields = _batch_request(request)
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        return _raw(_batch_body(ids, services.get_cards_map(ids), fields))
+    except Exception as e:
+        return _err(str(e))
+
 @require_GET
 def compare_api(request):
     a = request.GET.get("a")
@@ -88,15 +224,16 @@ def compare_api(request):
     if not a or not b:
         return _err("Provide a and b query params", status=400)
     try:
-        pa = services.get_pokemon(a)
-        pb = services.get_pokemon(b)
-        return _ok({"a": _card(pa), "b": _card(pb)})
+        pa = services.get_card(a)
+        pb = services.get_card(b)
+        return _raw(jsonenc.obj({"a": pa.json(), "b": pb.json()}))
     except services.PokeAPIError as e:
         return _err(str(e))
     except Exception as e:
         return _err(f"Unexpected error: {e}", status=500)
 
 @require_GET
+@cache_response
 def types_api(request):
     try:
         t = services.get_types()
@@ -105,6 +242,7 @@ def types_api(request):
         return _err(str(e))
 
 @require_GET
+@cache_response
 def abilities_api(request):
     try:
         names = services.get_all_abilities()
@@ -112,15 +250,39 @@ def abilities_api(request):
     except Exception as e:
         return _err(str(e))
 
+@require_GET
+def upstream_api(request):
+    return _ok(services.get_client().stats())
+
+@require_GET
+def ready_view(request):
+    # Load balancer readiness: 503 while the warm-up is still running.
+    return _ok(warmup.progress(), status=200 if warmup.is_ready() else 503)
+
+@require_GET
+def metrics_view(request):
+    stats = services.get_client().stats()
+    states = {"closed": 0, "half-open": 1, "open": 2}
+    state, failures = stats.pop("circuit_state"), stats.pop("consecutive_failures")
+    counters = [(f"pokeapi_client_{k}_total", v, {}) for k, v in stats.items()]
+    gauges = [
+        ("pokeapi_circuit_state", states.get(state, -1), {}),
+        ("pokeapi_consecutive_failures", failures, {}),
+        ("pokedex_cache_lru_entries", len(get_tier().lru), {}),
+    ]
+    gauges += [("pokedex_upstream_queue_depth", n, {"priority": p}) for p, n in get_scheduler().depth().items()]
+    return HttpResponse(metrics.REGISTRY.render(gauges, counters), content_type="text/plain; version=0.0.4; charset=utf-8")
+
 @require_GET
 def evolution_api(request, identifier):
     try:
         evo = services.get_evolution_chain_by_pokemon(identifier)
-        return _ok({"names": services.evo_chain_names(evo)})
+        return _ok(_evolution_payload(evo))
     except Exception as e:
         return _err(str(e))
 
 @require_GET
+@cache_response
 def coverage_api(request):
     team = request.GET.get("team", "")
     names = [x.strip() for x in team.split(",") if x.strip()]
@@ -130,7 +292,107 @@ def coverage_api(request):
     except Exception as e:
         return _err(str(e))
 
+def _teams_from_request(request, limit=None):
+    # GET: repeated ?team=a,b,c params. POST: {"teams": [["a", "b"], ...]}.
+    if request.method == "POST":
+        body = json.loads(request.body or b"{}")
+        teams = body.get("teams", []) if isinstance(body, dict) else None
+        if not isinstance(teams, list) or not all(isinstance(t, list) for t in teams):
+            raise ValueError("teams must be a list of name lists")
+        teams = [[str(x).strip() for x in t if str(x).strip()] for t in teams]
+    else:
+        teams = [[x.strip() for x in t.split(",") if x.strip()] for t in request.GET.getlist("team")]
+    limit = limit or getattr(settings, "TEAM_BATCH_LIMIT", 500)
+    if len(teams) > limit:
+        raise ValueError(f"At most {limit} teams per request")
+    return [t[:6] for t in teams]
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def typechart_api(request):
+    try:
+        teams = _teams_from_request(request)
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        chart = services.type_chart()
+        payload = {"types": chart.names, "matrix": chart.rows()}
+        if teams:
+            coverage = services.team_coverage_many(teams)
+            payload["teams"] = [{"team": t, "coverage": c} for t, c in zip(teams, coverage)]
+        return _ok(payload)
+    except Exception as e:
+        return _err(str(e))
+
+def _ndjson_line(row):
+    return jsonenc.dumps(row) + b"\n"
+
+def _ndjson(lines):
+    return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+EXPORT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+EXPORT_COLUMNS = ("id", "name", "image", "types", "height", "weight") + team_analytics.STATS
+
+def _export_params(request):
+    fmt = request.GET.get("format", "ndjson")
+    if fmt not in EXPORT_TYPES:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_TYPES)}")
+    filters = {"type_name": request.GET.get("type"), "ability_name": request.GET.get("ability"),
+               "q": request.GET.get("q"), "mode": _search_mode(request)}
+    return fmt, filters
+
+def _csv_line(values):
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+def _export_line(card, fmt):
+    if fmt == "ndjson":
+        return card.json() + b"\n"
+    d = _card(card)
+    return _csv_line([d["id"], d["name"], d["image"], "/".join(d["types"]), d["height"], d["weight"]]
+                     + [d["stats"].get(s, "") for s in team_analytics.STATS])
+
+def _export_response(lines, fmt):
+    response = StreamingHttpResponse(lines, content_type=EXPORT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="pokedex.{fmt}"'
+    return response
+
+@require_GET
+def export_api(request):
+    try:
+        fmt, filters = _export_params(request)
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        names = services.export_names(**filters)
+    except services.PokeAPIError as e:
+        return _err(str(e))
+
+    def lines():
+        if fmt == "csv":
+            yield _csv_line(EXPORT_COLUMNS)
+        for card in services.iter_cards(names):
+            yield _export_line(card, fmt)
+
+    return _export_response(lines(), fmt)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def teams_api(request):
+    try:
+        teams = _teams_from_request(request, limit=getattr(settings, "BULK_TEAM_LIMIT", 10000))
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        chart = services.type_chart()
+        cards = services.get_cards_map(list(dict.fromkeys(n for team in teams for n in team)))
+    except Exception as e:
+        return _err(str(e))
+    return _ndjson(_ndjson_line(row) for row in team_analytics.analyze(teams, cards, chart))
+
 @require_GET
+@cache_response
 def average_api(request):
     team = request.GET.get("team", "")
     names = [x.strip() for x in team.split(",") if x.strip()][:6]
@@ -0,0 +1,207 @@
+import asyncio
+from functools import wraps
+from django.conf import settings
+from django.http import HttpResponseNotAllowed
+from . import aservices, jsonenc, services, teams as team_analytics, warmup
+from .api import (EXPORT_COLUMNS, _batch_body, _batch_request, _csv_line, _detail_payload, _err, _evolution_payload,
+                  _export_line, _export_params, _export_response, _fields, _list_body, _list_request, _ndjson,
+                  _ndjson_line, _not_ready, _ok, _raw, _similar_body, _similar_params, _teams_from_request)
+from .api import metrics_view, ready_view  # noqa: F401  served unchanged by urls.py
+from .response_cache import cache_response
+
+# Async versions of the api.py endpoints, served when ASYNC_API=1 under an
+# ASGI server (see pokedex_project/asgi.py). Responses are identical to the
+# sync views; upstream calls run on the event loop instead of blocking a
+# worker. Django 4.2's method/CSRF decorators do not wrap coroutines, hence
+# the small `endpoint` helper.
+
+def endpoint(*methods):
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            return await view(request, *args, **kwargs)
+        wrapper.csrf_exempt = "POST" in methods
+        return wrapper
+    return decorator
+
+@endpoint("GET")
+@cache_response
+async def pokemon_index(request):
+    try:
+        filters, offset, page_size = _list_request(request)
+        fields = _fields(request.GET.get("fields"))
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        data = await aservices.find_pokemon(offset=offset, limit=page_size, **filters)
+        return _raw(_list_body(data, filters, offset, page_size, fields))
+    except services.PokeAPIError as e:
+        return _err(str(e), hint="The Pokémon escaped our request. Try again.")
+    except Exception as e:
+        return _err(f"Unexpected error: {e}", status=500)
+
+@endpoint("GET")
+@warmup.tracks_popularity
+@cache_response
+async def pokemon_detail(request, identifier):
+    try:
+        card, species, evo = await asyncio.gather(
+            aservices.get_card(identifier),
+            aservices.get_pokemon_species(identifier),
+            aservices.get_evolution_chain_by_pokemon(identifier),
+        )
+        return _ok(_detail_payload(card, species, evo))
+    except services.PokeAPIError as e:
+        return _err(str(e), hint="Double-check the name or ID.")
+    except Exception as e:
+        return _err(f"Unexpected error: {e}", status=500)
+
+@endpoint("GET")
+@cache_response
+async def similar_api(request, identifier):
+    try:
+        k, types = _similar_params(request)
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        card, found = await aservices.similar_pokemon(identifier, k, types)
+        return _raw(_similar_body(card, found))
+    except services.NotReadyError as e:
+        return _not_ready(e)
+    except services.PokeAPIError as e:
+        return _err(str(e), hint="Double-check the name or ID.")
+    except Exception as e:
+        return _err(f"Unexpected error: {e}", status=500)
+
+@endpoint("GET", "POST")
+@cache_response
+async def batch_api(request):
+    try:
+        ids, fields = _batch_request(request)
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        return _raw(_batch_body(ids, await aservices.get_cards_map(ids), fields))
+    except Exception as e:
+        return _err(str(e))
+
+@endpoint("GET")
+async def compare_api(request):
+    a = request.GET.get("a")
+    b = request.GET.get("b")
+    if not a or not b:
+        return _err("Provide a and b query params", status=400)
+    try:
+        pa, pb = await asyncio.gather(aservices.get_card(a), aservices.get_card(b))
+        return _raw(jsonenc.obj({"a": pa.json(), "b": pb.json()}))
+    except services.PokeAPIError as e:
+        return _err(str(e))
+    except Exception as e:
+        return _err(f"Unexpected error: {e}", status=500)
+
+@endpoint("GET")
+@cache_response
+async def types_api(request):
+    try:
+        return _ok(await aservices.get_types())
+    except Exception as e:
+        return _err(str(e))
+
+@endpoint("GET")
+@cache_response
+async def abilities_api(request):
+    try:
+        names = await aservices.get_all_abilities()
+        return _ok({"count": len(names), "results": names})
+    except Exception as e:
+        return _err(str(e))
+
+@endpoint("GET")
+async def upstream_api(request):
+    return _ok(services.get_client().stats())
+
+@endpoint("GET")
+async def evolution_api(request, identifier):
+    try:
+        evo = await aservices.get_evolution_chain_by_pokemon(identifier)
+        return _ok(_evolution_payload(evo))
+    except Exception as e:
+        return _err(str(e))
+
+@endpoint("GET")
+@cache_response
+async def coverage_api(request):
+    team = request.GET.get("team", "")
+    names = [x.strip() for x in team.split(",") if x.strip()][:6]
+    try:
+        return _ok({"team": names, "coverage": await aservices.team_coverage(names)})
+    except Exception as e:
+        return _err(str(e))
+
+@endpoint("GET", "POST")
+async def typechart_api(request):
+    try:
+        teams = _teams_from_request(request)
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        chart = await aservices.type_chart()
+        payload = {"types": chart.names, "matrix": chart.rows()}
+        if teams:
+            coverage = await aservices.team_coverage_many(teams)
+            payload["teams"] = [{"team": t, "coverage": c} for t, c in zip(teams, coverage)]
+        return _ok(payload)
+    except Exception as e:
+        return _err(str(e))
+
+@endpoint("GET")
+async def export_api(request):
+    try:
+        fmt, filters = _export_params(request)
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        names = await aservices.export_names(**filters)
+    except services.PokeAPIError as e:
+        return _err(str(e))
+
+    async def lines():
+        if fmt == "csv":
+            yield _csv_line(EXPORT_COLUMNS)
+        async for card in aservices.iter_cards(names):
+            yield _export_line(card, fmt)
+
+    return _export_response(lines(), fmt)
+
+@endpoint("POST")
+async def teams_api(request):
+    try:
+        teams = _teams_from_request(request, limit=getattr(settings, "BULK_TEAM_LIMIT", 10000))
+    except ValueError as e:
+        return _err(str(e), status=400)
+    try:
+        chart, cards = await asyncio.gather(
+            aservices.type_chart(),
+            aservices.get_cards_map(list(dict.fromkeys(n for team in teams for n in team))),
+        )
+    except Exception as e:
+        return _err(str(e))
+
+    async def lines():
+        # An async iterator, or ASGI would buffer the whole stream.
+        for row in team_analytics.analyze(teams, cards, chart):
+            yield _ndjson_line(row)
+
+    return _ndjson(lines())
+
+@endpoint("GET")
+@cache_response
+async def average_api(request):
+    team = request.GET.get("team", "")
+    names = [x.strip() for x in team.split(",") if x.strip()][:6]
+    try:
+        return _ok({"team": names, "average_stats": await aservices.average_stats(names)})
+    except Exception as e:
+        return _err(str(e))
@@ -2,3 +2,11 @@ from django.apps import AppConfig
 class PokedexConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pokedex"
+
+    def ready(self):
+        # WhiteNoise scans WHITENOISE_ROOT when the middleware loads.
+        from django.conf import settings
+        try:
+            settings.SPRITE_ROOT.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass
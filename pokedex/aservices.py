@@ -0,0 +1,284 @@
+import asyncio
+import time
+from collections import deque
+from functools import partial
+from urllib.parse import urljoin
+from asgiref.sync import sync_to_async
+from . import catalog, metrics, resultsets, scheduler, search, services, similar, snapshot, typechart
+from .cards import PokemonCard
+from .errors import PokeAPIError
+from .evolution import FlatChain, url_id
+from .http_client import get_async_client
+from .services import (BASE, CONCURRENCY, EXPORT_CHUNK, EXPORT_LOOKAHEAD, TTL, _card_key, _evo_index_key, _evo_key,
+                       _key, _pokemon_url)
+from .tiered_cache import get_tier
+
+# Async mirror of services.py for the ASGI API (api_async.py). Upstream I/O
+# goes through the httpx client and the async cache tier; the local catalog
+# is a sync ORM layer, so it is reached through sync_to_async. Pure helpers
+# (evo_chain_names, average_card_stats, the type chart) are shared.
+
+_catalog_ready = sync_to_async(catalog.ready)
+
+async def _fetch(url, params=None):
+    # Same snapshot read-through as services._fetch; mmap reads and single
+    # appends are cheap enough to do on the event loop.
+    key, store = _key(url, params), snapshot.get_store()
+    entry = store.get(key) if store is not None else None
+    if entry is not None and time.time() < entry[1]:
+        metrics.record("snapshot_hit")
+        return entry[0]
+    try:
+        data = await scheduler.get_scheduler().afetch(key, partial(get_async_client().get_json, url, params))
+    except PokeAPIError:
+        if entry is None:
+            raise
+        metrics.record("snapshot_stale_served")
+        return entry[0]
+    if store is not None:
+        store.put(key, data, TTL)
+    return data
+
+async def _get(url, params=None, ttl=TTL):
+    return await get_tier().aget(_key(url, params), partial(_fetch, url, params), ttl,
+                                 partial(services._fetch, url, params))
+
+async def _cached_many(keys, fetch, refresh, ttl=TTL):
+    # keys: {item: cache key}; fetch is the async loader, refresh its blocking
+    # twin for background revalidation. Failed items are left out.
+    tier = get_tier()
+    entries = await tier.aget_entries(list(keys.values()))
+    out = {}
+    for item, key in keys.items():
+        if key in entries:
+            data, fresh_until = entries[key]
+            if time.time() >= fresh_until:
+                await asyncio.to_thread(tier.refresh, key, partial(refresh, item), ttl)
+            out[item] = data
+    missing = [item for item in keys if item not in out]
+    if not missing:
+        return out
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def load(item):
+        entry = tier.lru.get(keys[item])
+        if entry is not None:
+            return entry[0]
+        async with sem:
+            try:
+                data = await tier.acoalesce(keys[item], partial(fetch, item))
+            except PokeAPIError:
+                return None
+            tier.remember(keys[item], data, ttl)
+            return data
+
+    results = await asyncio.gather(*(load(item) for item in missing))
+    fetched = {item: data for item, data in zip(missing, results) if data is not None}
+    if fetched:
+        await tier.aset_many({keys[item]: data for item, data in fetched.items()}, ttl)
+    out.update(fetched)
+    return out
+
+async def _get_many(urls, ttl=TTL):
+    return await _cached_many({url: _key(url) for url in urls}, _fetch, services._fetch, ttl)
+
+async def list_pokemon(offset=0, limit=20):
+    if await _catalog_ready():
+        return await sync_to_async(catalog.list_pokemon)(offset=offset, limit=limit)
+    return await _get(urljoin(BASE + "/", "pokemon/"), params={"offset": offset, "limit": limit})
+
+async def _fetch_card(identifier):
+    return PokemonCard.from_api(await _fetch(_pokemon_url(identifier)))
+
+async def get_card(identifier):
+    if await _catalog_ready():
+        p = await sync_to_async(catalog.get_pokemon)(identifier)
+        if p is not None:
+            return PokemonCard.from_api(p)
+    return await get_tier().aget(_card_key(identifier), partial(_fetch_card, identifier), TTL,
+                                 partial(services._fetch_card, identifier))
+
+async def get_cards_map(identifiers):
+    found = {}
+    if await _catalog_ready():
+        docs = await sync_to_async(catalog.get_pokemon_map)(identifiers)
+        found = {i: PokemonCard.from_api(p) for i, p in docs.items()}
+    missing = {i: _card_key(i) for i in identifiers if i not in found}
+    if missing:
+        found.update(await _cached_many(missing, _fetch_card, services._fetch_card))
+    return found
+
+async def get_cards(identifiers):
+    found = await get_cards_map(identifiers)
+    return [found[i] for i in identifiers if i in found]
+
+async def get_pokemon_species(identifier):
+    if await _catalog_ready():
+        species = await sync_to_async(catalog.get_species)(identifier)
+        if species is not None:
+            return species
+    return await _get(urljoin(BASE + "/", f"pokemon-species/{identifier}/"))
+
+async def get_types():
+    if await _catalog_ready():
+        return await sync_to_async(catalog.get_types)()
+    return await _get(urljoin(BASE + "/", "type/"))
+
+async def get_type_detail(name):
+    if await _catalog_ready():
+        detail = await sync_to_async(catalog.get_type_detail)(name)
+        if detail is not None:
+            return detail
+    return await _get(urljoin(BASE + "/", f"type/{name}/"))
+
+async def get_type_details(names):
+    if await _catalog_ready():
+        return await sync_to_async(services.get_type_details)(names)
+    urls = [urljoin(BASE + "/", f"type/{n}/") for n in names]
+    found = await _get_many(urls)
+    return [found[u] for u in urls if u in found]
+
+async def get_ability_detail(name):
+    return await _get(urljoin(BASE + "/", f"ability/{name}/"))
+
+async def get_all_abilities():
+    if await _catalog_ready():
+        return await sync_to_async(catalog.get_all_abilities)()
+    data = await _get(urljoin(BASE + "/", "ability/"), params={"limit": 10000})
+    return [a["name"] for a in data.get("results", [])]
+
+async def _chain_id_of(identifier):
+    if await _catalog_ready():
+        chain_id = await sync_to_async(catalog.get_evolution_chain_id)(identifier)
+        if chain_id is not False:
+            return chain_id
+    chain = (await get_pokemon_species(identifier)).get("evolution_chain", {})
+    return chain.get("id") or url_id(chain.get("url"))
+
+async def _fetch_chain(chain_id):
+    data = await sync_to_async(catalog.get_evolution_chain)(chain_id) if await _catalog_ready() else None
+    chain = FlatChain.from_api(data or await _fetch(urljoin(BASE + "/", f"evolution-chain/{chain_id}/")))
+    await get_tier().aset_many({_evo_index_key(m): chain.id for m in chain.members()}, TTL)
+    return chain
+
+async def get_evolution_chain_by_pokemon(identifier):
+    tier = get_tier()
+    chain_id = await tier.aget(_evo_index_key(identifier), partial(_chain_id_of, identifier), TTL,
+                               partial(services._chain_id_of, identifier))
+    if chain_id is None:
+        return None
+    return await tier.aget(_evo_key(chain_id), partial(_fetch_chain, chain_id), TTL,
+                           partial(services._fetch_chain, chain_id))
+
+async def all_pokemon_names():
+    count = (await list_pokemon(offset=0, limit=1)).get("count", 0)
+    return [item["name"] for item in (await list_pokemon(offset=0, limit=count)).get("results", [])]
+
+async def search_index():
+    index = search.current()
+    return index if index is not None else search.install(await all_pokemon_names())
+
+async def _type_names(type_name):
+    if await _catalog_ready():
+        return await sync_to_async(catalog.names)(type_name=type_name)
+    return [p["pokemon"]["name"] for p in (await get_type_detail(type_name)).get("pokemon", [])]
+
+async def _ability_names(ability_name):
+    if await _catalog_ready():
+        return await sync_to_async(catalog.names)(ability_name=ability_name)
+    return [p["pokemon"]["name"] for p in (await get_ability_detail(ability_name)).get("pokemon", [])]
+
+async def _combined_ids(index, type_name=None, ability_name=None, q=None, mode="substring"):
+    tier = get_tier()
+
+    async def atom(part, aloader, loader):
+        async def load():
+            return resultsets.pack(index, await aloader())
+        return await tier.aget(resultsets.key(index, part), load, TTL, lambda: resultsets.pack(index, loader()))
+
+    async def searched():
+        return index.search(q, mode)
+
+    return resultsets.combine(
+        index,
+        await atom(f"type:{type_name}", partial(_type_names, type_name),
+                   partial(services._type_names, type_name)) if type_name else None,
+        await atom(f"ability:{ability_name}", partial(_ability_names, ability_name),
+                   partial(services._ability_names, ability_name)) if ability_name else None,
+        await atom(f"q:{mode}:{q}", searched, partial(index.search, q, mode)) if q else None,
+    )
+
+async def result_ids(**filters):
+    index = await search_index()
+    filters = services.search_filters(**filters)
+    key = resultsets.key(index, resultsets.filter_key(**filters))
+    return index, await get_tier().aget(key, partial(_combined_ids, index, **filters), TTL,
+                                        partial(services._combined_ids, index, **filters))
+
+async def find_pokemon(offset=0, limit=24, **filters):
+    f = services.search_filters(**filters)
+    if not (f["type_name"] or f["ability_name"] or f["q"]):
+        data = await list_pokemon(offset=offset, limit=limit)
+        return {"count": data.get("count", 0),
+                "results": await get_cards([i["name"] for i in data.get("results", [])])}
+    if f["q"] and not (f["type_name"] or f["ability_name"]) and f["mode"] == "substring":
+        if f["q"].isdigit() or f["q"] in await search_index():
+            try:
+                return {"count": 1, "results": [await get_card(f["q"])]}
+            except PokeAPIError:
+                pass
+    index, ids = await result_ids(**f)
+    return {"count": len(ids), "results": await get_cards([index.names[i] for i in ids[offset:offset + limit]])}
+
+async def export_names(**filters):
+    f = services.search_filters(**filters)
+    if not (f["type_name"] or f["ability_name"] or f["q"]):
+        if await _catalog_ready():
+            return await sync_to_async(catalog.names)()
+        return await all_pokemon_names()
+    index, ids = await result_ids(**f)
+    return [index.names[i] for i in ids]
+
+async def iter_cards(names, chunk_size=EXPORT_CHUNK, lookahead=EXPORT_LOOKAHEAD):
+    # Async twin of services.iter_cards: at most `lookahead` chunks are
+    # being hydrated ahead of the consumer.
+    pending = deque()
+    try:
+        for start in range(0, len(names), chunk_size):
+            pending.append(asyncio.ensure_future(get_cards(names[start:start + chunk_size])))
+            if len(pending) > lookahead:
+                for card in await pending.popleft():
+                    yield card
+        while pending:
+            for card in await pending.popleft():
+                yield card
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def average_stats(pokemon_names):
+    return services.average_card_stats(await get_cards(pokemon_names))
+
+stat_index = sync_to_async(services.stat_index)  # never waits for the build (see services)
+
+async def similar_pokemon(identifier, k=10, types=()):
+    card, stats = await asyncio.gather(get_card(identifier), stat_index())
+    values = dict(card.stats)
+    found = stats.nearest([values.get(s, 0) for s in similar.STATS], k, types, exclude=card.name)
+    cards = await get_cards_map([name for name, _ in found])
+    return card, [(cards[name], dist) for name, dist in found if name in cards]
+
+async def type_chart():
+    chart = typechart.current()
+    if chart is not None:
+        return chart
+    names = [t["name"] for t in (await get_types()).get("results", [])]
+    return typechart.install({d["name"]: d.get("damage_relations", {}) for d in await get_type_details(names)})
+
+async def team_coverage_many(teams):
+    chart = await type_chart()
+    cards = await get_cards_map(list(dict.fromkeys(n for team in teams for n in team)))
+    return chart.coverage_many([[cards[n].types if n in cards else () for n in team] for team in teams])
+
+async def team_coverage(team_names):
+    return (await team_coverage_many([team_names]))[0]
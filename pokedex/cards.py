@@ -0,0 +1,68 @@
+# Compact projection of a /pokemon/{id} document holding only what the list,
+# detail, compare, average and coverage paths render. Cards are cached on
+# their own key (services.get_card / get_cards) instead of the raw JSON,
+# which carries moves, game indices and every sprite variant. Each card also
+# memoizes its API JSON (json()), so a card that lives in the LRU is encoded
+# once per process rather than once per response.
+
+from . import jsonenc
+
+class PokemonCard:
+    FIELDS = ("id", "name", "image", "types", "height", "weight", "stats", "abilities")
+    __slots__ = FIELDS + ("_json",)
+
+    def __init__(self, id, name, image, types, height, weight, stats, abilities):
+        self.id = id
+        self.name = name
+        self.image = image
+        self.types = types
+        self.height = height
+        self.weight = weight
+        self.stats = stats
+        self.abilities = abilities
+        self._json = None
+
+    @classmethod
+    def from_api(cls, p):
+        sprites = p.get("sprites") or {}
+        artwork = ((sprites.get("other") or {}).get("official-artwork") or {}).get("front_default")
+        return cls(
+            p.get("id"),
+            p.get("name"),
+            artwork or sprites.get("front_default"),
+            tuple(t["type"]["name"] for t in p.get("types", [])),
+            p.get("height"),
+            p.get("weight"),
+            tuple((s["stat"]["name"], int(s["base_stat"])) for s in p.get("stats", [])),
+            tuple(a["ability"]["name"] for a in p.get("abilities", [])),
+        )
+
+    def __getstate__(self):
+        return tuple(getattr(self, f) for f in self.FIELDS)
+
+    def __setstate__(self, state):
+        for f, v in zip(self.FIELDS, state):
+            setattr(self, f, v)
+        self._json = None
+
+    def __eq__(self, other):
+        return isinstance(other, PokemonCard) and self.__getstate__() == other.__getstate__()
+
+    def __repr__(self):
+        return f"<PokemonCard {self.id} {self.name}>"
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "image": self.image,
+            "types": list(self.types),
+            "height": self.height,
+            "weight": self.weight,
+            "stats": dict(self.stats),
+        }
+
+    def json(self):
+        if self._json is None:
+            self._json = jsonenc.dumps(self.as_dict())
+        return self._json
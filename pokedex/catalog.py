@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Q
+from .models import Ability, CatalogSync, EvolutionChain, Pokemon, Type
+from .tiered_cache import get_tier
+
+# Read side of the local catalog filled by `manage.py sync_pokedex`.
+# Everything returned here mimics the PokeAPI JSON shape so the views,
+# templates and api._card work unchanged on either source.
+
+READY_KEY = "catalog:ready"
+PREFETCH = ("type_slots__type", "ability_slots__ability", "stats")
+
+def ready():
+    # Only a completed sync counts: a partial, limited or still-running one
+    # would silently truncate lists, so those keep going to PokeAPI.
+    if not getattr(settings, "POKEDEX_LOCAL_CATALOG", True):
+        return False
+    state = cache.get(READY_KEY)
+    if state is None:
+        try:
+            state = CatalogSync.objects.exists()
+        except DatabaseError:
+            state = False
+        cache.set(READY_KEY, state, 60)
+    return state
+
+def mark_complete(pokemon_count):
+    CatalogSync.objects.update_or_create(pk=1, defaults={"pokemon_count": pokemon_count})
+    mark_dirty()
+
+def mark_dirty():
+    cache.delete(READY_KEY)
+    get_tier().bump_version()
+
+def _queryset():
+    return Pokemon.objects.prefetch_related(*PREFETCH)
+
+def _lookup(identifier):
+    identifier = str(identifier).lower()
+    if identifier.isdigit():
+        return {"id": int(identifier)}
+    return {"name": identifier}
+
+def to_api(p):
+    return {
+        "id": p.id,
+        "name": p.name,
+        "height": p.height,
+        "weight": p.weight,
+        "sprites": {
+            "front_default": p.sprite or None,
+            "other": {"official-artwork": {"front_default": p.artwork or None}},
+        },
+        "types": [{"slot": s.slot, "type": {"name": s.type.name}} for s in p.type_slots.all()],
+        "abilities": [
+            {"slot": s.slot, "is_hidden": s.is_hidden, "ability": {"name": s.ability.name}}
+            for s in p.ability_slots.all()
+        ],
+        "stats": [{"base_stat": s.base_stat, "stat": {"name": s.name}} for s in p.stats.all()],
+        "species": {"name": p.species or p.name},
+    }
+
+def get_pokemon(identifier):
+    p = _queryset().filter(**_lookup(identifier)).first()
+    return to_api(p) if p else None
+
+def get_pokemon_map(identifiers):
+    ids = [i for i in identifiers if str(i).isdigit()]
+    names = [str(i).lower() for i in identifiers if not str(i).isdigit()]
+    rows = {}
+    for p in _queryset().filter(Q(id__in=ids) | Q(name__in=names)):
+        rows[str(p.id)] = rows[p.name] = p
+    return {i: to_api(rows[str(i).lower()]) for i in identifiers if str(i).lower() in rows}
+
+def list_pokemon(offset=0, limit=20):
+    qs = Pokemon.objects.order_by("id")
+    return {
+        "count": qs.count(),
+        "results": [{"name": n, "id": i} for i, n in qs.values_list("id", "name")[offset:offset + limit]],
+    }
+
+def names(type_name=None, ability_name=None):
+    qs = Pokemon.objects.order_by("id")
+    if type_name:
+        qs = qs.filter(types__name=type_name.lower())
+    if ability_name:
+        qs = qs.filter(abilities__name=ability_name.lower())
+    return list(qs.values_list("name", flat=True))
+
+def get_species(identifier):
+    p = Pokemon.objects.filter(**_lookup(identifier)).first()
+    if p is None:
+        return None
+    return {
+        "name": p.species or p.name,
+        "flavor_text_entries": [{"flavor_text": p.flavor_text, "language": {"name": "en"}}] if p.flavor_text else [],
+        "evolution_chain": {"id": p.evolution_chain_id} if p.evolution_chain_id else {},
+    }
+
+def get_evolution_chain_id(identifier):
+    # False when the Pokémon is not in the catalog, None when it has no chain.
+    rows = list(Pokemon.objects.filter(**_lookup(identifier)).values_list("evolution_chain_id", flat=True)[:1])
+    return rows[0] if rows else False
+
+def get_evolution_chain(chain_id):
+    return EvolutionChain.objects.filter(id=chain_id).values_list("data", flat=True).first()
+
+def get_types():
+    names = list(Type.objects.values_list("name", flat=True))
+    return {"count": len(names), "results": [{"name": n} for n in names]}
+
+def get_type_detail(name):
+    t = Type.objects.filter(name=name.lower()).first()
+    if t is None:
+        return None
+    return {"name": t.name, "damage_relations": t.damage_relations}
+
+def get_all_abilities():
+    return list(Ability.objects.order_by("name").values_list("name", flat=True))
@@ -0,0 +1,11 @@
+class PokeAPIError(Exception):
+    pass
+
+class CircuitOpenError(PokeAPIError):
+    pass
+
+class NotReadyError(Exception):
+    # Data that is being built in the background; the API answers 503.
+    def __init__(self, message, retry_after=30):
+        super().__init__(message)
+        self.retry_after = retry_after
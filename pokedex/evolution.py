@@ -0,0 +1,77 @@
+import re
+
+# Flattened evolution chain, cached once per chain (services.get_evolution)
+# and shared by every member through the `evo-of:{name or id}` index, so a
+# detail page resolves its chain with two cache reads and no species call.
+# `names` keeps the depth-first order of the old recursive walk.
+
+ID_RE = re.compile(r"/(\d+)/?$")
+
+def url_id(url):
+    m = ID_RE.search(url or "")
+    return int(m.group(1)) if m else None
+
+def _condition(detail):
+    # The non-empty requirements of one evolution_details entry, with named
+    # resources reduced to their names.
+    out = {}
+    for k, v in detail.items():
+        if k == "trigger" or v is None or v is False or v == "" or v == []:
+            continue
+        out[k] = v.get("name") if isinstance(v, dict) else v
+    return out
+
+class FlatChain:
+    __slots__ = ("id", "names", "species_ids", "stages", "triggers")
+
+    def __init__(self, id, names, species_ids, stages, triggers):
+        self.id = id
+        self.names = names
+        self.species_ids = species_ids
+        self.stages = stages
+        self.triggers = triggers
+
+    @classmethod
+    def from_api(cls, evo):
+        names, ids, stages, triggers = [], [], [], []
+        stack = [(evo["chain"], 0, None)] if evo and "chain" in evo else []
+        while stack:
+            node, depth, parent = stack.pop()
+            name = node["species"]["name"]
+            names.append(name)
+            ids.append(url_id(node["species"].get("url")))
+            if depth == len(stages):
+                stages.append([])
+            stages[depth].append(name)
+            if parent is not None:
+                details = node.get("evolution_details") or [{}]
+                triggers.append((parent, name, (details[0].get("trigger") or {}).get("name"),
+                                 tuple(_condition(details[0]).items())))
+            stack.extend((nxt, depth + 1, name) for nxt in reversed(node.get("evolves_to", [])))
+        return cls(evo.get("id") if evo else None, tuple(names), tuple(i for i in ids if i is not None),
+                   tuple(tuple(s) for s in stages), tuple(triggers))
+
+    def members(self):
+        # Every identifier (species name or id) that should resolve to this chain.
+        return self.names + tuple(str(i) for i in self.species_ids)
+
+    def __getstate__(self):
+        return tuple(getattr(self, f) for f in self.__slots__)
+
+    def __setstate__(self, state):
+        for f, v in zip(self.__slots__, state):
+            setattr(self, f, v)
+
+    def __eq__(self, other):
+        return isinstance(other, FlatChain) and self.__getstate__() == other.__getstate__()
+
+    def __repr__(self):
+        return f"<FlatChain {self.id} {'>'.join(self.names)}>"
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "names": list(self.names),
+            "stages": [list(s) for s in self.stages],
+            "triggers": [{"from": a, "to": b, "trigger": t} | dict(cond) for a, b, t, cond in self.triggers],
+        }
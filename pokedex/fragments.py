@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import render_to_string
+from django.utils.functional import SimpleLazyObject
+from django.utils.safestring import mark_safe
+from . import metrics
+from .tiered_cache import get_tier
+
+# Pre-rendered HTML fragments. Templates use {% cache fragment_ttl name ...
+# data_version %} (card markup per Pokémon); views use `render` for
+# fragments whose inputs are expensive to load (the filter dropdowns), so a
+# hit skips the loading too. Keys include the data version
+# (TieredCache.version), so a data change retires every fragment. Both go to
+# the `template_fragments` cache alias when it is configured.
+
+def _cache():
+    try:
+        return caches["template_fragments"]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+def ttl():
+    return getattr(settings, "FRAGMENT_CACHE_TTL", 3600)
+
+def render(name, vary_on, template, load):
+    # HTML of `template` rendered with load(); load() runs only on a miss and
+    # may raise, in which case nothing is cached.
+    key = make_template_fragment_key(name, [get_tier().version(), *vary_on])
+    html = _cache().get(key)
+    if html is None:
+        metrics.record("fragment_miss")
+        html = render_to_string(template, load())
+        _cache().set(key, html, ttl())
+    else:
+        metrics.record("fragment_hit")
+    return mark_safe(html)
+
+def context(request):
+    # Context processor: what {% cache %} blocks key on. The version is only
+    # fetched by templates that use it.
+    return {"fragment_ttl": ttl(), "data_version": SimpleLazyObject(lambda: get_tier().version())}
@@ -0,0 +1,244 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+import weakref
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+from . import metrics
+from .errors import CircuitOpenError, PokeAPIError
+
+# Shared keep-alive session for every PokeAPI call. Transient failures
+# (connection errors, timeouts, 429 and 5xx) are retried with jittered
+# exponential backoff, honouring Retry-After; consecutive failures trip a
+# circuit breaker so a degraded upstream fails fast instead of holding
+# workers for the full timeout. Callers with a cached copy keep serving it
+# (see tiered_cache), so an open breaker mostly shows up as stale data.
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, threshold=5, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        # After reset_timeout one trial call goes through. A trial that never
+        # reports back (an exception outside the retry loop) times out the
+        # same way, so the breaker cannot stay half-open for good.
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.opened_at = now
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def failure(self):
+        # Returns True when this failure opened the circuit.
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                opened = self.state != self.OPEN
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return opened
+            return False
+
+def _retry_after(resp, cap):
+    # Seconds to wait, capped; None when the header is missing or unparsable.
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        wait = float(value)
+    except ValueError:
+        try:
+            wait = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, min(wait, cap))
+
+class PokeAPIClient:
+    def __init__(self, pool_size=20, connect_timeout=3.05, read_timeout=10, retries=2,
+                 backoff=0.25, max_wait=5, breaker=None):
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.counters = dict.fromkeys(
+            ("requests", "responses_2xx", "responses_4xx", "responses_5xx", "retries",
+             "network_errors", "timeouts", "circuit_opened", "short_circuited", "bytes_received"), 0)
+        self._lock = threading.Lock()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counters)
+        out["circuit_state"] = self.breaker.state
+        out["consecutive_failures"] = self.breaker.failures
+        return out
+
+    def _sleep(self, attempt, resp=None):
+        wait = _retry_after(resp, self.max_wait) if resp is not None else None
+        if wait is None:
+            wait = random.uniform(0, min(self.max_wait, self.backoff * 2 ** attempt))
+        self._count("retries")
+        time.sleep(wait)
+
+    def _get(self, url, params=None, breaker=None):
+        breaker = breaker or self.breaker
+        if not breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError("PokeAPI is unavailable right now (circuit open); try again shortly.")
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            self._count("requests")
+            t0 = time.perf_counter()
+            try:
+                resp = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                metrics.observe("upstream", time.perf_counter() - t0)
+                self._count("timeouts" if isinstance(e, requests.Timeout) else "network_errors")
+                if last:
+                    self._failed(breaker)
+                    raise PokeAPIError(f"Network error to PokeAPI: {e}")
+                self._sleep(attempt)
+                continue
+            self._received(resp.status_code, len(resp.content), time.perf_counter() - t0)
+            if resp.status_code in RETRY_STATUSES:
+                if last:
+                    self._failed(breaker)
+                    raise PokeAPIError(f"PokeAPI error {resp.status_code}: {resp.text[:200]}")
+                self._sleep(attempt, resp)
+                continue
+            breaker.success()
+            if resp.status_code != 200:
+                raise PokeAPIError(f"PokeAPI error {resp.status_code}: {resp.text[:200]}")
+            return resp
+
+    def get_json(self, url, params=None):
+        return self._get(url, params).json()
+
+    def get_bytes(self, url, breaker=None):
+        # Same pool and retry policy for non-PokeAPI hosts (artwork); pass a
+        # separate breaker so their outages do not trip PokeAPI's.
+        return self._get(url, breaker=breaker).content
+
+    def _received(self, status, size, seconds):
+        self._count(f"responses_{min(status // 100, 5)}xx" if status >= 400 else "responses_2xx")
+        self._count("bytes_received", size)
+        metrics.observe("upstream", seconds)
+        metrics.record("upstream_bytes", size)
+
+    def _failed(self, breaker=None):
+        if (breaker or self.breaker).failure():
+            self._count("circuit_opened")
+
+class AsyncPokeAPIClient:
+    # Non-blocking twin of PokeAPIClient built on httpx. It shares the sync
+    # client's settings, breaker and counters so monitoring sees one upstream.
+
+    def __init__(self, sync_client):
+        import httpx
+        self.httpx = httpx
+        self.sync = sync_client
+        connect, read = sync_client.timeout
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=sync_client.pool_size),
+        )
+
+    async def _sleep(self, attempt, resp=None):
+        c = self.sync
+        wait = _retry_after(resp, c.max_wait) if resp is not None else None
+        if wait is None:
+            wait = random.uniform(0, min(c.max_wait, c.backoff * 2 ** attempt))
+        c._count("retries")
+        await asyncio.sleep(wait)
+
+    async def get_json(self, url, params=None):
+        c = self.sync
+        if not c.breaker.allow():
+            c._count("short_circuited")
+            raise CircuitOpenError("PokeAPI is unavailable right now (circuit open); try again shortly.")
+        for attempt in range(c.retries + 1):
+            last = attempt == c.retries
+            c._count("requests")
+            t0 = time.perf_counter()
+            try:
+                resp = await self.client.get(url, params=params)
+            except self.httpx.HTTPError as e:
+                metrics.observe("upstream", time.perf_counter() - t0)
+                c._count("timeouts" if isinstance(e, self.httpx.TimeoutException) else "network_errors")
+                if last:
+                    c._failed()
+                    raise PokeAPIError(f"Network error to PokeAPI: {e}")
+                await self._sleep(attempt)
+                continue
+            c._received(resp.status_code, len(resp.content), time.perf_counter() - t0)
+            if resp.status_code in RETRY_STATUSES:
+                if last:
+                    c._failed()
+                    raise PokeAPIError(f"PokeAPI error {resp.status_code}: {resp.text[:200]}")
+                await self._sleep(attempt, resp)
+                continue
+            c.breaker.success()
+            if resp.status_code != 200:
+                raise PokeAPIError(f"PokeAPI error {resp.status_code}: {resp.text[:200]}")
+            return resp.json()
+
+_client = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PokeAPIClient(
+                    pool_size=getattr(settings, "POKEAPI_POOL_SIZE", 20),
+                    connect_timeout=getattr(settings, "POKEAPI_CONNECT_TIMEOUT", 3.05),
+                    read_timeout=getattr(settings, "POKEAPI_READ_TIMEOUT", 10),
+                    retries=getattr(settings, "POKEAPI_RETRIES", 2),
+                    backoff=getattr(settings, "POKEAPI_RETRY_BACKOFF", 0.25),
+                    max_wait=getattr(settings, "POKEAPI_RETRY_MAX_WAIT", 5),
+                    breaker=CircuitBreaker(
+                        threshold=getattr(settings, "POKEAPI_BREAKER_THRESHOLD", 5),
+                        reset_timeout=getattr(settings, "POKEAPI_BREAKER_RESET", 30),
+                    ),
+                )
+    return _client
+
+def get_async_client():
+    # httpx clients are bound to the event loop that created them.
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncPokeAPIClient(get_client())
+    return client
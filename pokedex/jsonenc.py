@@ -0,0 +1,34 @@
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # stdlib json, compact
+    orjson = None
+
+# JSON bodies for the API as UTF-8 bytes. orjson (optional) does the dynamic
+# parts; cards carry their own pre-encoded fragment (PokemonCard.json) and
+# list responses are joined from those with array()/obj() instead of building
+# dicts and encoding them again on every request.
+
+_encoder = DjangoJSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+def _default(o):
+    return _encoder.default(o)
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return _encoder.encode(data).encode()
+
+def array(fragments):
+    return b"[" + b",".join(fragments) + b"]"
+
+def obj(items):
+    # JSON object from a dict whose bytes values are already-encoded JSON.
+    return b"{" + b",".join(
+        dumps(k) + b":" + (v if isinstance(v, bytes) else dumps(v)) for k, v in items.items()
+    ) + b"}"
+
+def extend(fragment, items):
+    # An encoded object with `items` appended, e.g. a card plus its distance.
+    return fragment[:-1] + b"," + obj(items)[1:] if items else fragment
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from pokedex import snapshot
+
+class Command(BaseCommand):
+    help = "Export, import, compact or inspect the on-disk PokeAPI response snapshot (SNAPSHOT_PATH)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["export", "import", "compact", "stats"])
+        parser.add_argument("file", nargs="?", help="Snapshot file to export to or import from.")
+        parser.add_argument("--ttl", type=int, default=None,
+                            help="On import, mark the imported records fresh for this many seconds.")
+
+    def handle(self, *args, **opts):
+        store = snapshot.get_store()
+        if store is None:
+            raise CommandError("The snapshot is disabled; set SNAPSHOT_PATH.")
+        action, path = opts["action"], opts["file"]
+        if action in ("export", "import") and not path:
+            raise CommandError(f"{action} needs a snapshot file.")
+        try:
+            if action == "export":
+                self.stdout.write(f"Exported {store.export(path)} records to {path}")
+            elif action == "import":
+                count = store.merge(snapshot.Snapshot(path, create=False), ttl=opts["ttl"])
+                self.stdout.write(f"Imported {count} records from {path}")
+            elif action == "compact":
+                count, before, after = store.compact()
+                self.stdout.write(f"Compacted to {count} records: {before / 1024:.1f} KB -> {after / 1024:.1f} KB")
+            else:
+                for k, v in store.stats().items():
+                    self.stdout.write(f"{k}: {v}")
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
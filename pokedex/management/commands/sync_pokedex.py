@@ -0,0 +1,115 @@
+from urllib.parse import urljoin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from pokedex import catalog, services
+from pokedex.evolution import url_id
+from pokedex.models import Ability, EvolutionChain, Pokemon, PokemonAbility, PokemonType, Stat, Type
+
+def _url(path):
+    return urljoin(services.BASE + "/", path)
+
+def _flavor(species):
+    for ft in species.get("flavor_text_entries", []):
+        if ft.get("language", {}).get("name") == "en":
+            return ft.get("flavor_text", "").replace("\n", " ").replace("\f", " ")
+    return ""
+
+class Command(BaseCommand):
+    help = "Ingest Pokémon, types, abilities and evolution chains from PokeAPI into the local catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--limit", type=int, default=None, help="Only consider the first N Pokémon of the index.")
+        parser.add_argument("--full", action="store_true", help="Re-fetch Pokémon that are already in the catalog.")
+
+    def handle(self, *args, **opts):
+        try:
+            self.sync_types()
+            self.sync_abilities()
+            synced, total = self.sync_pokemon(opts["batch_size"], opts["limit"], opts["full"])
+        except services.PokeAPIError as e:
+            raise CommandError(str(e))
+        finally:
+            catalog.mark_dirty()
+        # Only a run over the whole index lets the site switch to the catalog.
+        if opts["limit"] is None and synced == total:
+            catalog.mark_complete(total)
+            self.stdout.write(f"catalog complete: {total} Pokémon")
+        elif not catalog.ready():
+            self.stdout.write(f"catalog incomplete ({synced}/{total}); pages still use PokeAPI")
+
+    def sync_types(self):
+        index = services._get(_url("type/"), params={"limit": 1000})
+        details = services._get_many([t["url"] for t in index.get("results", [])])
+        Type.objects.bulk_create(
+            [Type(name=d["name"], damage_relations=d.get("damage_relations", {})) for d in details.values()],
+            update_conflicts=True, unique_fields=["name"], update_fields=["damage_relations"],
+        )
+        self.stdout.write(f"types: {len(details)}")
+
+    def sync_abilities(self):
+        index = services._get(_url("ability/"), params={"limit": 10000})
+        names = [a["name"] for a in index.get("results", [])]
+        Ability.objects.bulk_create([Ability(name=n) for n in names], ignore_conflicts=True)
+        self.stdout.write(f"abilities: {len(names)}")
+
+    def sync_pokemon(self, batch_size, limit, full):
+        count = services._get(_url("pokemon/"), params={"limit": 1}).get("count", 0)
+        index = services._get(_url("pokemon/"), params={"offset": 0, "limit": count})
+        entries = [(url_id(e["url"]), e["url"]) for e in index.get("results", [])][:limit]
+        done = set() if full else set(Pokemon.objects.values_list("id", flat=True))
+        todo = [url for pid, url in entries if pid not in done]
+        self.stdout.write(f"pokemon: {len(entries) - len(todo)} already synced, {len(todo)} to fetch")
+
+        type_ids = dict(Type.objects.values_list("name", "id"))
+        ability_ids = dict(Ability.objects.values_list("name", "id"))
+        for start in range(0, len(todo), batch_size):
+            batch = todo[start:start + batch_size]
+            docs = list(services._get_many(batch).values())
+            species = services._get_many(dict.fromkeys(d["species"]["url"] for d in docs if d.get("species")))
+            chain_urls = {s.get("evolution_chain", {}).get("url") for s in species.values()} - {None}
+            known = set(EvolutionChain.objects.filter(id__in=[url_id(u) for u in chain_urls]).values_list("id", flat=True))
+            chains = services._get_many([u for u in chain_urls if url_id(u) not in known])
+            for name in {a["ability"]["name"] for d in docs for a in d.get("abilities", [])} - ability_ids.keys():
+                ability_ids[name] = Ability.objects.get_or_create(name=name)[0].id
+            self.store_batch(docs, species, chains, known, type_ids, ability_ids)
+            self.stdout.write(f"pokemon: {min(start + batch_size, len(todo))}/{len(todo)}")
+        # Failed fetches are simply missing here, so count what actually got stored.
+        return Pokemon.objects.filter(id__in=[pid for pid, _ in entries]).count(), len(entries)
+
+    @transaction.atomic
+    def store_batch(self, docs, species, chains, known, type_ids, ability_ids):
+        EvolutionChain.objects.bulk_create(
+            [EvolutionChain(id=c["id"], data=c) for c in chains.values()], ignore_conflicts=True,
+        )
+        # Chains whose fetch failed stay unlinked rather than breaking the FK.
+        stored = known | {c["id"] for c in chains.values()}
+        rows, types, abilities, stats = [], [], [], []
+        for d in docs:
+            sp = species.get(d.get("species", {}).get("url"), {})
+            sprites = d.get("sprites") or {}
+            chain_id = url_id(sp.get("evolution_chain", {}).get("url"))
+            rows.append(Pokemon(
+                id=d["id"], name=d["name"], height=d.get("height") or 0, weight=d.get("weight") or 0,
+                artwork=((sprites.get("other") or {}).get("official-artwork") or {}).get("front_default") or "",
+                sprite=sprites.get("front_default") or "",
+                species=sp.get("name", ""), flavor_text=_flavor(sp),
+                evolution_chain_id=chain_id if chain_id in stored else None,
+            ))
+            types += [PokemonType(pokemon_id=d["id"], type_id=type_ids[t["type"]["name"]], slot=t.get("slot", 1))
+                      for t in d.get("types", []) if t["type"]["name"] in type_ids]
+            abilities += [PokemonAbility(pokemon_id=d["id"], ability_id=ability_ids[a["ability"]["name"]],
+                                         slot=a.get("slot", 1), is_hidden=a.get("is_hidden", False))
+                          for a in d.get("abilities", [])]
+            stats += [Stat(pokemon_id=d["id"], name=s["stat"]["name"], base_stat=s["base_stat"], position=i)
+                      for i, s in enumerate(d.get("stats", []))]
+        Pokemon.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=["id"],
+            update_fields=["name", "height", "weight", "artwork", "sprite", "species", "flavor_text", "evolution_chain"],
+        )
+        ids = [r.id for r in rows]
+        for model in (PokemonType, PokemonAbility, Stat):
+            model.objects.filter(pokemon_id__in=ids).delete()
+        PokemonType.objects.bulk_create(types)
+        PokemonAbility.objects.bulk_create(abilities)
+        Stat.objects.bulk_create(stats)
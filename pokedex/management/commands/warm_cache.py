@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from pokedex import warmup
+
+class Command(BaseCommand):
+    help = ("Prefetch filter lists, type details, the first list pages and the most requested Pokémon "
+            "into the cache. Only useful with a shared CACHE_BACKEND (file, redis, memcached); for "
+            "locmem use WARM_ON_STARTUP.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=None, help="List pages to hydrate (default WARM_PAGES).")
+        parser.add_argument("--popular", type=int, default=None, help="Most requested Pokémon to prefetch (default WARM_POPULAR).")
+        parser.add_argument("--concurrency", type=int, default=None)
+        parser.add_argument("--rate", type=float, default=None, help="Max warm-up steps started per second.")
+
+    def handle(self, *args, **opts):
+        def report(name, ok, seconds):
+            if opts["verbosity"] > 1 or not ok:
+                style = self.style.SUCCESS if ok else self.style.ERROR
+                self.stdout.write(style(f"{'ok' if ok else 'FAILED':6} {seconds * 1000:8.1f} ms  {name}"))
+
+        result = warmup.run(opts["pages"], opts["popular"], opts["concurrency"], opts["rate"], report)
+        took = result["finished"] - result["started"]
+        self.stdout.write(f"Warmed {result['done'] - result['failed']}/{result['total']} steps in {took:.1f}s"
+                          + (f", {result['failed']} failed" if result["failed"] else ""))
@@ -0,0 +1,139 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from django.shortcuts import render as django_render
+
+# Per-request and per-process instrumentation. MetricsMiddleware opens a
+# RequestMetrics for every request and stores it in a context variable; the
+# cache tier, the PokeAPI clients and `render` below add to it through
+# `record`/`observe`, which also feed the process-wide Registry exposed at
+# /metrics in Prometheus text format.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.counts = {}
+        self.durations = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, value=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def max_time(self, name, seconds):
+        # For waits that overlap across threads, where a sum would exceed the request.
+        with self._lock:
+            self.durations[name] = max(self.durations.get(name, 0.0), seconds)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Registry:
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.histograms.setdefault(key, Histogram()).observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self, gauges=(), counters=()):
+        # `gauges` and `counters` are extra (name, value, labels) samples
+        # read from elsewhere, e.g. the PokeAPI client's own tallies.
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for name in sorted({n for n, _ in self.counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (n, labels), value in sorted(self.counters.items()):
+                    if n == name:
+                        lines.append(f"{name}{fmt(labels)} {value}")
+            for name in sorted({n for n, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (n, labels), h in sorted(self.histograms.items()):
+                    if n != name:
+                        continue
+                    running = 0
+                    for bound, count in zip(BUCKETS + ("+Inf",), h.buckets):
+                        running += count
+                        lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {running}")
+                    lines.append(f"{name}_sum{fmt(labels)} {h.sum:.6f}")
+                    lines.append(f"{name}_count{fmt(labels)} {h.count}")
+        typed = set()
+        for kind, samples in (("counter", counters), ("gauge", gauges)):
+            for name, value, labels in samples:
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{fmt(sorted(labels.items()))} {value}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+_current = contextvars.ContextVar("pokedex_request_metrics", default=None)
+
+def begin():
+    m = RequestMetrics()
+    return m, _current.set(m)
+
+def end(token):
+    _current.reset(token)
+
+def current():
+    return _current.get()
+
+def record(name, value=1):
+    # Counter event, e.g. record("cache_hit") or record("upstream_bytes", 1234).
+    m = _current.get()
+    if m is not None:
+        m.add(name, value)
+    REGISTRY.inc(f"pokedex_{name}_total", value)
+
+def observe(name, seconds):
+    # Timed event, e.g. observe("upstream", 0.12); also counts it.
+    m = _current.get()
+    if m is not None:
+        m.add_time(name, seconds)
+        m.add(name)
+    REGISTRY.observe(f"pokedex_{name}_duration_seconds", seconds)
+
+def render(request, template_name, context=None, *args, **kwargs):
+    t0 = time.perf_counter()
+    try:
+        return django_render(request, template_name, context, *args, **kwargs)
+    finally:
+        observe("render", time.perf_counter() - t0)
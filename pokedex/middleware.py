@@ -0,0 +1,122 @@
+import json
+import logging
+import re
+import weakref
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+log = logging.getLogger("pokedex.metrics")
+
+class MetricsMiddleware:
+    # Wraps each request in a metrics.RequestMetrics and reports it as a
+    # Server-Timing header, one JSON log line and process-wide counters.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        m, token = metrics.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end(token)
+        return self.finish(request, response, m)
+
+    async def __acall__(self, request):
+        m, token = metrics.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end(token)
+        return self.finish(request, response, m)
+
+    def finish(self, request, response, m):
+        total = m.elapsed()
+        c, d = m.counts, m.durations
+        upstream = d.get("upstream", 0.0)
+        render = d.get("render", 0.0)
+        view = getattr(getattr(request, "resolver_match", None), "url_name", None) or "unresolved"
+        timings = [
+            f'cache;desc="hit={c.get("cache_hit", 0)} stale={c.get("cache_stale", 0)} miss={c.get("cache_miss", 0)}"',
+            f'upstream;dur={upstream * 1000:.1f};desc="{c.get("upstream", 0)} calls, {c.get("upstream_bytes", 0)} B"',
+            f'queue;dur={d.get("upstream_wait", 0.0) * 1000:.1f};desc="longest wait, {c.get("upstream_deduplicated", 0)} deduplicated"',
+            f"render;dur={render * 1000:.1f}",
+            f"view;dur={(total - render) * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ]
+        response["Server-Timing"] = ", ".join(timings)
+        metrics.REGISTRY.inc("pokedex_http_requests_total", view=view, method=request.method, status=response.status_code)
+        metrics.REGISTRY.observe("pokedex_http_request_duration_seconds", total, view=view)
+        if log.isEnabledFor(logging.INFO):
+            log.info(json.dumps({
+                "method": request.method, "path": request.path, "view": view, "status": response.status_code,
+                "total_ms": round(total * 1000, 2), "render_ms": round(render * 1000, 2),
+                "upstream_ms": round(upstream * 1000, 2), "upstream_calls": c.get("upstream", 0),
+                "upstream_bytes": c.get("upstream_bytes", 0), "cache_hits": c.get("cache_hit", 0),
+                "cache_stale": c.get("cache_stale", 0), "cache_misses": c.get("cache_miss", 0),
+            }))
+        return response
+
+COMPRESSIBLE = ("text/", "application/json", "application/x-ndjson", "application/javascript", "image/svg+xml")
+BROTLI_QUALITY = 5
+re_accepts_br = re.compile(r"\bbr\b")
+
+class CompressionMiddleware(GZipMiddleware):
+    # Django's gzip, plus brotli for buffered responses when the client
+    # accepts it and the `brotli` package is installed; streams stay gzip.
+    # Only text-like types are touched, so sprites and other images pass
+    # through as they are.
+
+    def process_response(self, request, response):
+        if not response.get("Content-Type", "").startswith(COMPRESSIBLE):
+            return response
+        if (brotli is None or response.streaming or response.has_header("Content-Encoding")
+                or len(response.content) < 200
+                or not re_accepts_br.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))):
+            return super().process_response(request, response)
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    # WhiteNoise indexes WHITENOISE_ROOT once, when it loads (unless
+    # autorefresh, the DEBUG default). Files written later, like proxied
+    # sprites, are added with add_file() so the view serves each of them at
+    # most once per worker.
+    instances = weakref.WeakSet()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.instances.add(self)
+
+    @classmethod
+    def add_file(cls, path):
+        url = "/" + Path(path).relative_to(settings.WHITENOISE_ROOT).as_posix()
+        for mw in cls.instances:
+            if not mw.autorefresh and url not in mw.files:
+                mw.add_file_to_dictionary(url, str(path))
@@ -0,0 +1,125 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EvolutionChain',
+            fields=[
+                ('id', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('data', models.JSONField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Pokemon',
+            fields=[
+                ('id', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('height', models.PositiveIntegerField(default=0)),
+                ('weight', models.PositiveIntegerField(default=0)),
+                ('artwork', models.URLField(blank=True, max_length=300)),
+                ('sprite', models.URLField(blank=True, max_length=300)),
+                ('species', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('flavor_text', models.TextField(blank=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Type',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('damage_relations', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Stat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=32)),
+                ('base_stat', models.PositiveSmallIntegerField()),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('pokemon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='pokedex.pokemon')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PokemonType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField(default=1)),
+                ('pokemon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='type_slots', to='pokedex.pokemon')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pokemon_slots', to='pokedex.type')),
+            ],
+            options={
+                'ordering': ['slot'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PokemonAbility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField(default=1)),
+                ('is_hidden', models.BooleanField(default=False)),
+                ('ability', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pokemon_slots', to='pokedex.ability')),
+                ('pokemon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ability_slots', to='pokedex.pokemon')),
+            ],
+            options={
+                'ordering': ['slot'],
+            },
+        ),
+        migrations.AddField(
+            model_name='pokemon',
+            name='abilities',
+            field=models.ManyToManyField(related_name='pokemon', through='pokedex.PokemonAbility', to='pokedex.ability'),
+        ),
+        migrations.AddField(
+            model_name='pokemon',
+            name='evolution_chain',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='members', to='pokedex.evolutionchain'),
+        ),
+        migrations.AddField(
+            model_name='pokemon',
+            name='types',
+            field=models.ManyToManyField(related_name='pokemon', through='pokedex.PokemonType', to='pokedex.type'),
+        ),
+        migrations.AddConstraint(
+            model_name='stat',
+            constraint=models.UniqueConstraint(fields=('pokemon', 'name'), name='uniq_pokemon_stat'),
+        ),
+        migrations.AddConstraint(
+            model_name='pokemontype',
+            constraint=models.UniqueConstraint(fields=('pokemon', 'type'), name='uniq_pokemon_type'),
+        ),
+        migrations.AddConstraint(
+            model_name='pokemonability',
+            constraint=models.UniqueConstraint(fields=('pokemon', 'ability'), name='uniq_pokemon_ability'),
+        ),
+    ]
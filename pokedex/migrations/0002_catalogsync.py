@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokedex', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pokemon_count', models.PositiveIntegerField()),
+                ('completed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
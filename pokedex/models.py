@@ -0,0 +1,85 @@
+from django.db import models
+
+class Type(models.Model):
+    name = models.CharField(max_length=32, unique=True)
+    damage_relations = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return self.name
+
+class Ability(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+class EvolutionChain(models.Model):
+    id = models.PositiveIntegerField(primary_key=True)
+    data = models.JSONField()
+
+    def __str__(self):
+        return f"chain {self.id}"
+
+class Pokemon(models.Model):
+    id = models.PositiveIntegerField(primary_key=True)
+    name = models.CharField(max_length=64, unique=True)
+    height = models.PositiveIntegerField(default=0)
+    weight = models.PositiveIntegerField(default=0)
+    artwork = models.URLField(max_length=300, blank=True)
+    sprite = models.URLField(max_length=300, blank=True)
+    species = models.CharField(max_length=64, blank=True, db_index=True)
+    flavor_text = models.TextField(blank=True)
+    evolution_chain = models.ForeignKey(EvolutionChain, null=True, blank=True, on_delete=models.SET_NULL, related_name="members")
+    types = models.ManyToManyField(Type, through="PokemonType", related_name="pokemon")
+    abilities = models.ManyToManyField(Ability, through="PokemonAbility", related_name="pokemon")
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return self.name
+
+class PokemonType(models.Model):
+    pokemon = models.ForeignKey(Pokemon, on_delete=models.CASCADE, related_name="type_slots")
+    type = models.ForeignKey(Type, on_delete=models.CASCADE, related_name="pokemon_slots")
+    slot = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        ordering = ["slot"]
+        constraints = [models.UniqueConstraint(fields=["pokemon", "type"], name="uniq_pokemon_type")]
+
+class PokemonAbility(models.Model):
+    pokemon = models.ForeignKey(Pokemon, on_delete=models.CASCADE, related_name="ability_slots")
+    ability = models.ForeignKey(Ability, on_delete=models.CASCADE, related_name="pokemon_slots")
+    slot = models.PositiveSmallIntegerField(default=1)
+    is_hidden = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ["slot"]
+        constraints = [models.UniqueConstraint(fields=["pokemon", "ability"], name="uniq_pokemon_ability")]
+
+class Stat(models.Model):
+    pokemon = models.ForeignKey(Pokemon, on_delete=models.CASCADE, related_name="stats")
+    name = models.CharField(max_length=32, db_index=True)
+    base_stat = models.PositiveSmallIntegerField()
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ["position"]
+        constraints = [models.UniqueConstraint(fields=["pokemon", "name"], name="uniq_pokemon_stat")]
+
+class CatalogSync(models.Model):
+    # One row, written by sync_pokedex after a complete run; the catalog is
+    # only served once it exists.
+    pokemon_count = models.PositiveIntegerField()
+    completed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.pokemon_count} Pokémon, {self.completed_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,95 @@
+import hashlib
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from . import metrics
+from .tiered_cache import get_tier
+
+# Rendered-response cache for the read-only pages and API endpoints. Bodies
+# are stored in the shared cache tier under the path plus the normalized
+# query and the tier's data version, which moves whenever a background
+# refresh brings in changed PokeAPI data or the catalog is re-synced. Every
+# response gets a strong ETag and public Cache-Control, so browsers and CDNs
+# revalidate with If-None-Match and get a 304 without a body.
+
+PARAMS = ("page", "page_size", "q", "type", "ability", "team", "match", "cursor", "k", "ids", "fields")
+
+def _query(request):
+    get = request.GET
+    values = {
+        "page": get.get("page", "1"),
+        "page_size": get.get("page_size", str(settings.PAGE_SIZE)),
+        "q": get.get("q", "").strip().lower(),
+        "match": get.get("match", "substring"),
+    }
+    for name in PARAMS:
+        if name not in values:
+            values[name] = ",".join(v.strip() for v in get.getlist(name))
+    return "&".join(f"{k}={v}" for k, v in sorted(values.items()) if v)
+
+def _key(request, version):
+    return f"resp:{version}:{request.path}?{_query(request)}"
+
+def _entry(response):
+    # Only plain 200s that the view did not mark uncacheable are stored.
+    if response.status_code != 200 or response.streaming or response.has_header("Cache-Control"):
+        return None
+    body = response.content
+    return (f'"{hashlib.sha1(body).hexdigest()}"', response["Content-Type"], body)
+
+def _respond(request, entry, ttl):
+    etag, content_type, body = entry
+    # Weak comparison: compressed responses go out with a W/ ETag.
+    client = [e.removeprefix("W/") for e in parse_etags(request.headers.get("If-None-Match", ""))]
+    if etag in client or request.headers.get("If-None-Match") == "*":
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=content_type)
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=getattr(settings, "RESPONSE_MAX_AGE", 60),
+                        stale_while_revalidate=ttl)
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+def cache_response(view):
+    ttl = getattr(settings, "RESPONSE_CACHE_TTL", 300)
+    if ttl <= 0:
+        return view
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method != "GET":
+                return await view(request, *args, **kwargs)
+            tier = get_tier()
+            key = _key(request, await tier.shared.aget(tier.VERSION_KEY, 0))
+            entry = await tier.shared.aget(key)
+            metrics.record("response_cache_hit" if entry is not None else "response_cache_miss")
+            if entry is None:
+                response = await view(request, *args, **kwargs)
+                entry = _entry(response)
+                if entry is None:
+                    return response
+                await tier.shared.aset(key, entry, ttl)
+            return _respond(request, entry, ttl)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return view(request, *args, **kwargs)
+        tier = get_tier()
+        key = _key(request, tier.version())
+        entry = tier.shared.get(key)
+        metrics.record("response_cache_hit" if entry is not None else "response_cache_miss")
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            entry = _entry(response)
+            if entry is None:
+                return response
+            tier.shared.set(key, entry, ttl)
+        return _respond(request, entry, ttl)
+    return wrapper
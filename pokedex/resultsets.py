@@ -0,0 +1,50 @@
+from array import array
+from django.core import signing
+
+# Filter and search results as compact arrays of search-index ordinals
+# (position in SearchIndex.names, i.e. catalog order). services.result_ids
+# caches one array per filter atom (a type, an ability, a query) and one per
+# combination, keyed by the index version, so deep pages are an array slice.
+# Cursors are signed tokens carrying the filters and the next offset.
+
+CURSOR_SALT = "pokedex.cursor"
+
+def _typecode(index):
+    return "H" if len(index) <= 0xFFFF else "I"
+
+def key(index, part):
+    return f"rs:{index.version}:{part}"
+
+def filter_key(type_name=None, ability_name=None, q=None, mode="substring"):
+    return f"t={type_name or ''}|a={ability_name or ''}|q={mode}:{q or ''}"
+
+def pack(index, names):
+    rank = index.rank
+    return array(_typecode(index), (rank[n] for n in names if n in rank))
+
+def combine(index, type_ids=None, ability_ids=None, q_ids=None):
+    # Intersection of the given atoms. A query keeps its own (relevance)
+    # order; otherwise results are in catalog order.
+    sets = [ids for ids in (type_ids, ability_ids) if ids is not None]
+    if q_ids is not None:
+        ordered = q_ids
+    elif sets:
+        sets.sort(key=len)
+        ordered = sorted(sets.pop(0))
+    else:
+        return array(_typecode(index), range(len(index)))
+    for ids in sets:
+        members = set(ids)
+        ordered = [i for i in ordered if i in members]
+    return array(_typecode(index), ordered)
+
+def encode_cursor(filters, offset, page_size):
+    return signing.dumps({"f": filters, "o": offset, "n": page_size}, salt=CURSOR_SALT, compress=True)
+
+def decode_cursor(token):
+    # (filters, offset, page_size); ValueError for anything we did not issue.
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+        return dict(data["f"]), int(data["o"]), int(data["n"])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,222 @@
+import asyncio
+import contextvars
+import fcntl
+import heapq
+import itertools
+import logging
+import os
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from . import metrics
+
+# Upstream scheduler between services/aservices and the PokeAPI clients.
+# Every fetch takes a token from a bucket shared by all workers on the host
+# (a flock'ed state file, UPSTREAM_BUCKET_FILE) or, without a file, by this
+# process's threads. Callers waiting for a token are served by priority:
+# user-facing requests, then prefetch (warm-up, sprite prefetch), then
+# background cache refreshes. Identical in-flight URLs share one fetch, and
+# a user request joining a background fetch promotes it.
+
+log = logging.getLogger(__name__)
+
+USER, PREFETCH, BACKGROUND = 0, 1, 2
+PRIORITY_NAMES = ("user", "prefetch", "background")
+
+_priority = contextvars.ContextVar("upstream_priority", default=USER)
+
+@contextmanager
+def priority(level):
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+class TokenBucket:
+    STATE = struct.Struct("<dd")  # tokens, updated (wall clock, shared across processes)
+
+    def __init__(self, rate, burst, path=None):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.path = path
+        self._state = (float(self.burst), time.time())
+        self._lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+
+    def _refill(self, state, now):
+        tokens, updated = state
+        tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+        if tokens >= 1:
+            return (tokens - 1, now), 0.0
+        return (tokens, now), (1 - tokens) / self.rate
+
+    def _file(self):
+        # One descriptor per process: flock state is shared by descriptors
+        # inherited across fork, which would let workers pass each other.
+        if self._pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _take_shared(self, now):
+        fd = self._file()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            raw = os.pread(fd, self.STATE.size, 0)
+            state = self.STATE.unpack(raw) if len(raw) == self.STATE.size else (float(self.burst), now)
+            state, wait = self._refill(state, now)
+            os.pwrite(fd, self.STATE.pack(*state), 0)
+            return wait
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def take(self):
+        # 0 when a token was taken, else seconds until the next one is due.
+        now = time.time()
+        with self._lock:
+            if self.path:
+                try:
+                    return self._take_shared(now)
+                except OSError as e:
+                    log.warning("Upstream rate limit file %s unusable, limiting per process: %s", self.path, e)
+                    self.path = None
+            self._state, wait = self._refill(self._state, now)
+            return wait
+
+def _observe_wait(level, seconds):
+    m = metrics.current()
+    if m is not None:
+        m.max_time("upstream_wait", seconds)
+    metrics.REGISTRY.observe("pokedex_upstream_wait_seconds", seconds, priority=PRIORITY_NAMES[level])
+
+class Scheduler:
+    def __init__(self, bucket=None):
+        self.bucket = bucket
+        self._cv = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._inflight = {}
+        self._ainflight = {}
+
+    def depth(self):
+        with self._cv:
+            counts = [0] * len(PRIORITY_NAMES)
+            for level, _ in self._queue:
+                counts[level] += 1
+        return dict(zip(PRIORITY_NAMES, counts))
+
+    def acquire(self, ticket=None):
+        # Blocks until this caller holds a token; tickets ([level, seq]) are
+        # served lowest level first, FIFO within a level.
+        if self.bucket is None:
+            return
+        ticket = ticket or [_priority.get(), next(self._seq)]
+        t0 = time.perf_counter()
+        with self._cv:
+            heapq.heappush(self._queue, ticket)
+            self._cv.notify_all()
+            try:
+                while True:
+                    if self._queue[0] is ticket:
+                        wait = self.bucket.take()
+                        if not wait:
+                            break
+                        self._cv.wait(wait)
+                    else:
+                        self._cv.wait()
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cv.notify_all()
+        _observe_wait(ticket[0], time.perf_counter() - t0)
+
+    def _promote(self, ticket, level):
+        with self._cv:
+            if level < ticket[0]:
+                ticket[0] = level
+                heapq.heapify(self._queue)
+                self._cv.notify_all()
+
+    def fetch(self, key, fn):
+        # fn() once per key across threads, after acquiring a token.
+        level = _priority.get()
+        with self._cv:
+            slot = self._inflight.get(key)
+            leader = slot is None
+            if leader:
+                slot = self._inflight[key] = (Future(), [level, next(self._seq)])
+        fut, ticket = slot
+        if not leader:
+            metrics.record("upstream_deduplicated")
+            self._promote(ticket, level)
+            return fut.result()
+        try:
+            self.acquire(ticket)
+            result = fn()
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._cv:
+                self._inflight.pop(key, None)
+
+    async def aacquire(self):
+        if self.bucket is None:
+            return
+        with self._cv:
+            wait = None if self._queue else self.bucket.take()
+        if wait == 0:
+            _observe_wait(_priority.get(), 0.0)
+        else:
+            await asyncio.to_thread(self.acquire)
+
+    async def afetch(self, key, afn):
+        # Async twin of fetch(), deduplicating per event loop.
+        loop = asyncio.get_running_loop()
+        slot = (id(loop), key)
+        fut = self._ainflight.get(slot)
+        if fut is not None:
+            metrics.record("upstream_deduplicated")
+            return await asyncio.shield(fut)
+        fut = self._ainflight[slot] = loop.create_future()
+        try:
+            await self.aacquire()
+            result = await afn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            self._ainflight.pop(slot, None)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                rate = getattr(settings, "UPSTREAM_RATE", 0)
+                bucket = None
+                if rate > 0:
+                    bucket = TokenBucket(rate, getattr(settings, "UPSTREAM_BURST", int(rate * 2)),
+                                         getattr(settings, "UPSTREAM_BUCKET_FILE", "") or None)
+                _scheduler = Scheduler(bucket)
+    return _scheduler
@@ -0,0 +1,125 @@
+import bisect
+import hashlib
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+
+# In-process name index used by services.find_pokemon. Names are kept in
+# a sorted array for prefix lookups (bisect) and in trigram postings for
+# substring and fuzzy matching; results come back in catalog (Pokédex) order.
+
+GRAM = 3
+MODES = ("substring", "prefix", "fuzzy")
+
+def _grams(name):
+    return {name[i:i + GRAM] for i in range(len(name) - GRAM + 1)}
+
+def edit_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+class SearchIndex:
+    def __init__(self, names):
+        self.names = list(dict.fromkeys(n.lower() for n in names))
+        self.rank = {n: i for i, n in enumerate(self.names)}
+        # Identifies this name list; result sets of ordinals are only valid
+        # against the index they were built from (see resultsets.py).
+        self.version = hashlib.sha1("\n".join(self.names).encode()).hexdigest()[:12]
+        self.sorted = sorted(self.names)
+        self.postings = {}
+        for i, n in enumerate(self.names):
+            for g in _grams(n):
+                self.postings.setdefault(g, []).append(i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.rank
+
+    def prefix(self, q):
+        lo = bisect.bisect_left(self.sorted, q)
+        hi = bisect.bisect_left(self.sorted, q + "\uffff", lo)
+        return sorted(self.sorted[lo:hi], key=self.rank.__getitem__)
+
+    def substring(self, q):
+        grams = _grams(q)
+        if not grams:
+            return [n for n in self.names if q in n]
+        lists = sorted((self.postings.get(g, []) for g in grams), key=len)
+        hits = set(lists[0])
+        for ids in lists[1:]:
+            hits.intersection_update(ids)
+            if not hits:
+                return []
+        return [self.names[i] for i in sorted(hits) if q in self.names[i]]
+
+    def fuzzy(self, q, max_distance=None):
+        if max_distance is None:
+            max_distance = 1 if len(q) <= 4 else 2
+        # q-gram lemma: a match within k edits shares at least this many trigrams.
+        need = len(q) - GRAM + 1 - GRAM * max_distance
+        if need > 0:
+            counts = Counter(i for g in _grams(q) for i in self.postings.get(g, ()))
+            candidates = sorted(i for i, c in counts.items() if c >= need)
+        else:
+            candidates = range(len(self.names))
+        scored = []
+        for i in candidates:
+            d = edit_distance(q, self.names[i], max_distance)
+            if d <= max_distance:
+                scored.append((d, i))
+        return [self.names[i] for _, i in sorted(scored)]
+
+    def search(self, q, mode="substring"):
+        q = q.strip().lower()
+        if not q:
+            return []
+        if mode == "prefix":
+            return self.prefix(q)
+        if mode == "fuzzy":
+            return self.fuzzy(q)
+        return self.substring(q)
+
+_lock = threading.Lock()
+_index = None
+_built_at = 0.0
+
+def _ttl():
+    return getattr(settings, "SEARCH_INDEX_TTL", getattr(settings, "CACHE_TTL", 3600))
+
+def current():
+    # The live index, or None when it is missing or older than SEARCH_INDEX_TTL.
+    if _index is not None and time.monotonic() - _built_at < _ttl():
+        return _index
+    return None
+
+def install(names):
+    global _index, _built_at
+    _index = SearchIndex(names)
+    _built_at = time.monotonic()
+    return _index
+
+def get_index(loader):
+    # `loader` returns the full ordered name list; it is only called when the
+    # index is missing or stale.
+    index = current()
+    if index is not None:
+        return index
+    with _lock:
+        index = current()
+        return index if index is not None else install(loader())
+
+def reset():
+    global _index
+    _index = None
@@ -1,170 +1,358 @@
+import contextvars
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from django.conf import settings
-from django.core.cache import cache
-import requests
+from django.db import connection
 from urllib.parse import urljoin
+from . import catalog, metrics, resultsets, scheduler, search, similar, snapshot, typechart
+from .cards import PokemonCard
+from .errors import NotReadyError, PokeAPIError  # noqa: F401
+from .evolution import FlatChain, url_id
+from .http_client import get_client
+from .tiered_cache import get_tier
 
 BASE = getattr(settings, "POKEAPI_BASE_URL", "https://pokeapi.co/api/v2")
 TTL = getattr(settings, "CACHE_TTL", 3600)
+CONCURRENCY = getattr(settings, "POKEAPI_CONCURRENCY", 8)
+EXPORT_CHUNK = getattr(settings, "EXPORT_CHUNK_SIZE", 100)
+EXPORT_LOOKAHEAD = getattr(settings, "EXPORT_LOOKAHEAD", 2)
+STAT_INDEX_BUILD_TIMEOUT = getattr(settings, "STAT_INDEX_BUILD_TIMEOUT", 1800)
 
-class PokeAPIError(Exception):
-    pass
+def _key(url, params=None):
+    return f"poke:{url}:{params}"
 
-def _get(url, params=None, ttl=TTL):
-    key = f"poke:{url}:{params}"
-    data = cache.get(key)
-    if data is not None:
-        return data
+def _fetch(url, params=None):
+    # Below the cache tier sits the on-disk snapshot: fresh records skip the
+    # upstream call, stale ones are the fallback when PokeAPI fails.
+    key, store = _key(url, params), snapshot.get_store()
+    entry = store.get(key) if store is not None else None
+    if entry is not None and time.time() < entry[1]:
+        metrics.record("snapshot_hit")
+        return entry[0]
     try:
-        resp = requests.get(url, params=params, timeout=30)
-    except requests.RequestException as e:
-        raise PokeAPIError(f"Network error to PokeAPI: {e}")
-    if resp.status_code != 200:
-        raise PokeAPIError(f"PokeAPI error {resp.status_code}: {resp.text[:200]}")
-    data = resp.json()
-    cache.set(key, data, ttl)
+        data = scheduler.get_scheduler().fetch(key, partial(get_client().get_json, url, params))
+    except PokeAPIError:
+        if entry is None:
+            raise
+        metrics.record("snapshot_stale_served")
+        return entry[0]
+    if store is not None:
+        store.put(key, data, TTL)
     return data
 
+def _get(url, params=None, ttl=TTL):
+    return get_tier().get(_key(url, params), lambda: _fetch(url, params), ttl)
+
+def _cached_many(keys, fetch, ttl=TTL):
+    # keys: {item: cache key}. One cache round trip for the hits, concurrent
+    # fetch(item) calls for the misses; items that fail upstream are left out.
+    tier = get_tier()
+    entries = tier.get_entries(list(keys.values()))
+    now = time.time()
+    out = {}
+    for item, key in keys.items():
+        if key in entries:
+            data, fresh_until = entries[key]
+            if now >= fresh_until:
+                tier.refresh(key, partial(fetch, item), ttl)
+            out[item] = data
+    missing = [item for item in keys if item not in out]
+    if not missing:
+        return out
+
+    def load(item):
+        entry = tier.lru.get(keys[item])
+        if entry is not None:
+            return entry[0]
+        try:
+            data = tier.coalesce(keys[item], partial(fetch, item))
+        except PokeAPIError:
+            return None
+        tier.remember(keys[item], data, ttl)
+        return data
+
+    # Each task runs in a copy of the caller's context so upstream calls are
+    # attributed to the current request's metrics.
+    contexts = [contextvars.copy_context() for _ in missing]
+    with ThreadPoolExecutor(max_workers=max(1, min(CONCURRENCY, len(missing)))) as pool:
+        results = pool.map(lambda ctx, item: ctx.run(load, item), contexts, missing)
+        fetched = {item: data for item, data in zip(missing, results) if data is not None}
+    if fetched:
+        tier.set_many({keys[item]: data for item, data in fetched.items()}, ttl)
+    out.update(fetched)
+    return out
+
+def _get_many(urls, ttl=TTL):
+    return _cached_many({url: _key(url) for url in urls}, _fetch, ttl)
+
 def list_pokemon(offset=0, limit=20):
+    if catalog.ready():
+        return catalog.list_pokemon(offset=offset, limit=limit)
     url = urljoin(BASE + "/", "pokemon/")
     return _get(url, params={"offset": offset, "limit": limit})
 
-def get_pokemon(identifier):
-    url = urljoin(BASE + "/", f"pokemon/{identifier}/")
-    return _get(url)
+def _pokemon_url(identifier):
+    return urljoin(BASE + "/", f"pokemon/{identifier}/")
+
+def _card_key(identifier):
+    return f"card:{str(identifier).lower()}"
+
+def _fetch_card(identifier):
+    return PokemonCard.from_api(_fetch(_pokemon_url(identifier)))
+
+def get_card(identifier):
+    if catalog.ready():
+        p = catalog.get_pokemon(identifier)
+        if p is not None:
+            return PokemonCard.from_api(p)
+    return get_tier().get(_card_key(identifier), partial(_fetch_card, identifier), TTL)
+
+def get_cards_map(identifiers):
+    # {identifier: PokemonCard} for every identifier that resolved.
+    found = {}
+    if catalog.ready():
+        found = {i: PokemonCard.from_api(p) for i, p in catalog.get_pokemon_map(identifiers).items()}
+    missing = {i: _card_key(i) for i in identifiers if i not in found}
+    if missing:
+        found.update(_cached_many(missing, _fetch_card))
+    return found
+
+def get_cards(identifiers):
+    found = get_cards_map(identifiers)
+    return [found[i] for i in identifiers if i in found]
 
 def get_pokemon_species(identifier):
+    if catalog.ready():
+        species = catalog.get_species(identifier)
+        if species is not None:
+            return species
     url = urljoin(BASE + "/", f"pokemon-species/{identifier}/")
     return _get(url)
 
 def get_types():
+    if catalog.ready():
+        return catalog.get_types()
     url = urljoin(BASE + "/", "type/")
     return _get(url)
 
 def get_type_detail(name):
+    if catalog.ready():
+        detail = catalog.get_type_detail(name)
+        if detail is not None:
+            return detail
     url = urljoin(BASE + "/", f"type/{name}/")
     return _get(url)
 
+def get_type_details(names):
+    if catalog.ready():
+        return [d for d in (catalog.get_type_detail(n) for n in names) if d is not None]
+    urls = [urljoin(BASE + "/", f"type/{n}/") for n in names]
+    found = _get_many(urls)
+    return [found[u] for u in urls if u in found]
+
 def get_ability_detail(name):
     url = urljoin(BASE + "/", f"ability/{name}/")
     return _get(url)
 
 def get_all_abilities():
+    if catalog.ready():
+        return catalog.get_all_abilities()
     url = urljoin(BASE + "/", "ability/")
     data = _get(url, params={"limit": 10000})
     return [a["name"] for a in data.get("results", [])]
 
+def _evo_key(chain_id):
+    return f"evo:{chain_id}"
+
+def _evo_index_key(identifier):
+    return f"evo-of:{str(identifier).lower()}"
+
+def _chain_id_of(identifier):
+    if catalog.ready():
+        chain_id = catalog.get_evolution_chain_id(identifier)
+        if chain_id is not False:
+            return chain_id
+    chain = get_pokemon_species(identifier).get("evolution_chain", {})
+    return chain.get("id") or url_id(chain.get("url"))
+
+def _index_chain(chain):
+    # Point every member at the chain so their lookups skip the species call.
+    get_tier().set_many({_evo_index_key(m): chain.id for m in chain.members()}, TTL)
+
+def _fetch_chain(chain_id):
+    data = catalog.get_evolution_chain(chain_id) if catalog.ready() else None
+    chain = FlatChain.from_api(data or _fetch(urljoin(BASE + "/", f"evolution-chain/{chain_id}/")))
+    _index_chain(chain)
+    return chain
+
 def get_evolution_chain_by_pokemon(identifier):
-    species = get_pokemon_species(identifier)
-    evo_url = species.get("evolution_chain", {}).get("url")
-    if not evo_url:
+    # FlatChain or None. The species index usually answers without a species
+    # fetch; the chain itself is cached once for all its members.
+    tier = get_tier()
+    chain_id = tier.get(_evo_index_key(identifier), partial(_chain_id_of, identifier), TTL)
+    if chain_id is None:
         return None
-    return _get(evo_url)
-
-def filter_pokemon_by_type(type_name, page=1, page_size=24):
-    td = get_type_detail(type_name)
-    all_entries = [p["pokemon"]["name"] for p in td.get("pokemon", [])]
-    total = len(all_entries)
-    start = (page - 1) * page_size
-    end = start + page_size
-    slice_names = all_entries[start:end]
-    results = []
-    for name in slice_names:
-        try:
-            results.append(get_pokemon(name))
-        except Exception:
-            pass
-    return { "count": total, "results": results }
-
-def filter_pokemon_by_ability(ability_name, page=1, page_size=24):
-    ab = get_ability_detail(ability_name)
-    all_entries = [p["pokemon"]["name"] for p in ab.get("pokemon", [])]
-    total = len(all_entries)
-    start = (page - 1) * page_size
-    end = start + page_size
-    slice_names = all_entries[start:end]
-    results = []
-    for name in slice_names:
-        try:
-            results.append(get_pokemon(name))
-        except Exception:
-            pass
-    return { "count": total, "results": results }
+    return tier.get(_evo_key(chain_id), partial(_fetch_chain, chain_id), TTL)
+
+def all_pokemon_names():
+    count = list_pokemon(offset=0, limit=1).get("count", 0)
+    return [item["name"] for item in list_pokemon(offset=0, limit=count).get("results", [])]
 
-def search_pokemon(query, page=1, page_size=24):
+def _type_names(type_name):
+    if catalog.ready():
+        return catalog.names(type_name=type_name)
+    return [p["pokemon"]["name"] for p in get_type_detail(type_name).get("pokemon", [])]
+
+def _ability_names(ability_name):
+    if catalog.ready():
+        return catalog.names(ability_name=ability_name)
+    return [p["pokemon"]["name"] for p in get_ability_detail(ability_name).get("pokemon", [])]
+
+def search_filters(type_name=None, ability_name=None, q=None, mode="substring"):
+    # Normalized filter set: the result-set cache key and what cursors carry.
+    q = (q or "").strip().lower() or None
+    return {
+        "type_name": (type_name or "").strip().lower() or None,
+        "ability_name": (ability_name or "").strip().lower() or None,
+        "q": q,
+        "mode": mode if q else "substring",
+    }
+
+def _combined_ids(index, type_name=None, ability_name=None, q=None, mode="substring"):
+    tier = get_tier()
+
+    def atom(part, loader):
+        return tier.get(resultsets.key(index, part), lambda: resultsets.pack(index, loader()), TTL)
+
+    return resultsets.combine(
+        index,
+        atom(f"type:{type_name}", partial(_type_names, type_name)) if type_name else None,
+        atom(f"ability:{ability_name}", partial(_ability_names, ability_name)) if ability_name else None,
+        atom(f"q:{mode}:{q}", partial(index.search, q, mode)) if q else None,
+    )
+
+def result_ids(**filters):
+    # (index, ordinals of every Pokémon matching all of the filters).
+    index = search.get_index(all_pokemon_names)
+    filters = search_filters(**filters)
+    key = resultsets.key(index, resultsets.filter_key(**filters))
+    return index, get_tier().get(key, partial(_combined_ids, index, **filters), TTL)
+
+def find_pokemon(offset=0, limit=24, **filters):
+    # One page of cards matching type AND ability AND name query; any of
+    # them may be missing. Without filters this is the plain catalog list.
+    f = search_filters(**filters)
+    if not (f["type_name"] or f["ability_name"] or f["q"]):
+        data = list_pokemon(offset=offset, limit=limit)
+        return {"count": data.get("count", 0), "results": get_cards([i["name"] for i in data.get("results", [])])}
+    if f["q"] and not (f["type_name"] or f["ability_name"]) and f["mode"] == "substring":
+        if f["q"].isdigit() or f["q"] in search.get_index(all_pokemon_names):
+            try:
+                return {"count": 1, "results": [get_card(f["q"])]}
+            except PokeAPIError:
+                pass
+    index, ids = result_ids(**f)
+    return {"count": len(ids), "results": get_cards([index.names[i] for i in ids[offset:offset + limit]])}
+
+def export_names(**filters):
+    # Every name the list endpoints would page through for these filters.
+    f = search_filters(**filters)
+    if not (f["type_name"] or f["ability_name"] or f["q"]):
+        return catalog.names() if catalog.ready() else all_pokemon_names()
+    index, ids = result_ids(**f)
+    return [index.names[i] for i in ids]
+
+def _load_chunk(names):
     try:
-        p = get_pokemon(query.lower())
-        return { "count": 1, "results": [p] }
-    except Exception:
-        limit_pages = 5
-        aggregated = []
-        for i in range(limit_pages):
-            page_data = list_pokemon(offset=i*200, limit=200)
-            for item in page_data.get("results", []):
-                if query.lower() in item["name"]:
-                    try:
-                        aggregated.append(get_pokemon(item["name"]))
-                    except Exception:
-                        pass
-        total = len(aggregated)
-        start = (page - 1) * page_size
-        end = start + page_size
-        return { "count": total, "results": aggregated[start:end] }
+        return get_cards(names)
+    finally:
+        connection.close()
+
+def iter_cards(names, chunk_size=EXPORT_CHUNK, lookahead=EXPORT_LOOKAHEAD):
+    # Cards for `names` in order, hydrated chunk by chunk on a background
+    # pool that stays at most `lookahead` chunks ahead of the consumer, so
+    # memory is bounded however long the list is.
+    with ThreadPoolExecutor(max_workers=lookahead, thread_name_prefix="export") as pool:
+        pending = deque()
+        for start in range(0, len(names), chunk_size):
+            pending.append(pool.submit(_load_chunk, names[start:start + chunk_size]))
+            if len(pending) > lookahead:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
 
 def evo_chain_names(evo):
-    if not evo or "chain" not in evo:
-        return []
-    names = []
-    def walk(node):
-        names.append(node["species"]["name"])
-        for nxt in node.get("evolves_to", []):
-            walk(nxt)
-    walk(evo["chain"])
-    return names
+    return list(evo.names) if evo else []
 
 def average_stats(pokemon_names):
-    totals = {}
-    count = 0
-    for n in pokemon_names:
-        try:
-            p = get_pokemon(n)
-            for s in p.get("stats", []):
-                key = s["stat"]["name"]
-                totals[key] = totals.get(key, 0) + int(s["base_stat"])
-            count += 1
-        except Exception:
-            continue
-    if count == 0:
+    return average_card_stats(get_cards(pokemon_names))
+
+def _stat_index_key(index):
+    return f"stats:{index.version}"
+
+def _stat_index_loader(index):
+    return lambda: similar.StatIndex(get_cards(index.names))
+
+def build_stat_index():
+    # Blocking build; quick when the local catalog answers the cards.
+    index = search.get_index(all_pokemon_names)
+    return get_tier().get(_stat_index_key(index), _stat_index_loader(index), TTL)
+
+def stat_index():
+    # Without the local catalog the index hydrates every card upstream, which
+    # takes minutes under UPSTREAM_RATE. Requests never wait for that: a miss
+    # schedules one background build (warm-up also builds it) and raises
+    # NotReadyError.
+    if catalog.ready():
+        return build_stat_index()
+    index = search.get_index(all_pokemon_names)
+    key, tier = _stat_index_key(index), get_tier()
+    entry = tier.get_entry(key)
+    if entry is None or time.time() >= entry[1]:
+        tier.refresh(key, _stat_index_loader(index), TTL, lock_timeout=STAT_INDEX_BUILD_TIMEOUT)
+    if entry is None:
+        raise NotReadyError("The similarity index is still being built")
+    return entry[0]
+
+def start_stat_index():
+    # Warm-up step: builds the index when that is quick, otherwise only
+    # schedules the background build so readiness does not wait for it.
+    try:
+        stat_index()
+    except NotReadyError:
+        pass
+
+def similar_pokemon(identifier, k=10, types=()):
+    # (card, [(card, distance)]) for the k Pokémon whose base stats are
+    # closest to `identifier`'s, optionally limited to the given types.
+    card, stats = get_card(identifier), stat_index()
+    values = dict(card.stats)
+    found = stats.nearest([values.get(s, 0) for s in similar.STATS], k, types, exclude=card.name)
+    cards = get_cards_map([name for name, _ in found])
+    return card, [(cards[name], dist) for name, dist in found if name in cards]
+
+def average_card_stats(cards):
+    if not cards:
         return {}
-    return {k: round(v / count, 2) for k, v in totals.items()}
+    totals = {}
+    for c in cards:
+        for name, value in c.stats:
+            totals[name] = totals.get(name, 0) + value
+    return {k: round(v / len(cards), 2) for k, v in totals.items()}
+
+def _load_type_relations():
+    names = [t["name"] for t in get_types().get("results", [])]
+    return {d["name"]: d.get("damage_relations", {}) for d in get_type_details(names)}
+
+def type_chart():
+    return typechart.get_chart(_load_type_relations)
+
+def team_coverage_many(teams):
+    chart = type_chart()
+    cards = get_cards_map(list(dict.fromkeys(n for team in teams for n in team)))
+    return chart.coverage_many([[cards[n].types if n in cards else () for n in team] for team in teams])
 
 def team_coverage(team_names):
-    type_list = [t["name"] for t in get_types().get("results", [])]
-    detail_cache = {t: get_type_detail(t) for t in type_list}
-    rel = {}
-    for t, d in detail_cache.items():
-        dr = d.get("damage_relations", {})
-        rel[t] = {
-            "double_from": [x["name"] for x in dr.get("double_damage_from", [])],
-            "half_from":   [x["name"] for x in dr.get("half_damage_from", [])],
-            "no_from":     [x["name"] for x in dr.get("no_damage_from", [])],
-        }
-    team_types = []
-    for n in team_names:
-        try:
-            p = get_pokemon(n)
-            team_types.append([tt["type"]["name"] for tt in p.get("types", [])])
-        except Exception:
-            team_types.append([])
-    summary = {t: {"weak": 0, "resist": 0, "immune": 0} for t in type_list}
-    for attack_type in type_list:
-        weak_set = set(rel[attack_type]["double_from"])
-        resist_set = set(rel[attack_type]["half_from"])
-        immune_set = set(rel[attack_type]["no_from"])
-        for ptypes in team_types:
-            if any(pt in immune_set for pt in ptypes):
-                summary[attack_type]["immune"] += 1
-            elif any(pt in weak_set for pt in ptypes):
-                summary[attack_type]["weak"] += 1
-            elif any(pt in resist_set for pt in ptypes):
-                summary[attack_type]["resist"] += 1
-    return summary
+    return team_coverage_many([team_names])[0]
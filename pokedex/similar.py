@@ -0,0 +1,56 @@
+import heapq
+import math
+from array import array
+from .teams import STATS
+
+# Whole-catalog index for "similar Pokémon" (services.similar_pokemon).
+# Base stats are one row-major array('H') (Pokémon x STATS) and each
+# Pokémon's types one bit mask, so a type filter is an AND per row. It is
+# built once per name-index version and cached as a single tier entry. With
+# ~1300 rows an exact scan through heapq answers in a few milliseconds; a
+# KD-tree would not pay for itself in pure Python at this size.
+
+class StatIndex:
+    def __init__(self, cards):
+        width = len(STATS)
+        self.names = [c.name for c in cards]
+        self.type_bits = {t: 1 << i for i, t in enumerate(sorted({t for c in cards for t in c.types}))}
+        self.values = array("H", [0]) * (len(cards) * width)
+        self.masks = array("Q", [0]) * len(cards)
+        for i, card in enumerate(cards):
+            stats = dict(card.stats)
+            self.values[i * width:(i + 1) * width] = array("H", (stats.get(s, 0) for s in STATS))
+            self.masks[i] = self.mask(card.types)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __eq__(self, other):
+        return (isinstance(other, StatIndex) and self.names == other.names
+                and self.values == other.values and self.masks == other.masks)
+
+    def mask(self, types):
+        # None when a type is unknown, i.e. nothing can match.
+        bits = 0
+        for t in types:
+            if t not in self.type_bits:
+                return None
+            bits |= self.type_bits[t]
+        return bits
+
+    def nearest(self, target, k=10, types=(), exclude=None):
+        # [(name, distance)] for the k rows closest to `target` (one value per
+        # STATS entry) by Euclidean distance, restricted to Pokémon that have
+        # every type in `types`.
+        need = self.mask(types)
+        if need is None:
+            return []
+        t0, t1, t2, t3, t4, t5 = target
+        masks, names = self.masks, self.names
+        rows = zip(*[iter(self.values)] * len(STATS))
+        best = heapq.nsmallest(k, (
+            ((a - t0) ** 2 + (b - t1) ** 2 + (c - t2) ** 2 + (d - t3) ** 2 + (e - t4) ** 2 + (f - t5) ** 2, i)
+            for i, (a, b, c, d, e, f) in enumerate(rows)
+            if masks[i] & need == need and names[i] != exclude
+        ))
+        return [(names[i], round(math.sqrt(dist), 2)) for dist, i in best]
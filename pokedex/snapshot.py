@@ -0,0 +1,234 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from django.conf import settings
+
+# Append-only on-disk copy of PokeAPI responses, keyed like the cache tier
+# (`poke:{url}:{params}`), so a restarted or recycled worker starts from
+# everything the last one fetched. services._fetch reads it before going
+# upstream and appends what it fetches.
+#
+# File layout: MAGIC, then records of REC header + key + zlib(JSON). Every
+# append is one os.write on an O_APPEND descriptor, so processes can share a
+# file without locking. Readers mmap the file and index it lazily; a reader
+# that finds the file replaced (compaction, import) reopens it. Records are
+# crc-checked as they are indexed; a torn one left by a crashed writer is
+# skipped once intact records follow it.
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"PKSNAP01"
+REC = struct.Struct("<HIId")  # key length, payload length, crc32, fresh_until
+
+def _record_at(m, pos):
+    # (key, index entry, end) of the whole, intact record at `pos`, else None.
+    if pos + REC.size > len(m):
+        return None
+    klen, dlen, crc, fresh_until = REC.unpack_from(m, pos)
+    start = pos + REC.size + klen
+    end = start + dlen
+    if end > len(m) or zlib.crc32(memoryview(m)[start:end]) != crc:
+        return None
+    try:
+        key = m[pos + REC.size:start].decode()
+    except UnicodeDecodeError:
+        return None
+    return key, (start, dlen, crc, fresh_until), end
+
+def _next_record(m, pos):
+    # Offset of the first intact record after the bad one at `pos`: where its
+    # length prefix says it ends if only the payload is damaged, otherwise
+    # the next offset that parses with a matching crc.
+    if pos + REC.size <= len(m):
+        klen, dlen, _, _ = REC.unpack_from(m, pos)
+        end = pos + REC.size + klen + dlen
+        if end < len(m) and _record_at(m, end) is not None:
+            return end
+    for p in range(pos + 1, len(m) - REC.size + 1):
+        if _record_at(m, p) is not None:
+            return p
+    return None
+
+class Snapshot:
+    def __init__(self, path, stale_ttl=30 * 86400, create=True):
+        self.path = Path(path)
+        self.stale_ttl = stale_ttl
+        self.index = {}
+        self._lock = threading.RLock()
+        self._map = None
+        self._fd = None
+        self._writer = None
+        self._ino = None
+        self._scanned = 0
+        if create and not self.path.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                pass
+            else:
+                os.write(fd, MAGIC)
+                os.close(fd)
+        self._open()
+        self._sync()
+
+    def _open(self):
+        for fd in (self._fd, self._writer):
+            if fd is not None:
+                os.close(fd)
+        self._fd = os.open(self.path, os.O_RDONLY)
+        self._writer = None
+        self._ino = os.fstat(self._fd).st_ino
+        self._map = None
+        self._scanned = 0
+        self.index = {}
+
+    def _sync(self):
+        # Pick up records appended since the last scan, by any process.
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._ino:
+            self._open()
+        if st.st_size <= max(self._scanned, len(MAGIC)):
+            return
+        m = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+        if m[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a PokeAPI snapshot")
+        pos = max(self._scanned, len(MAGIC))
+        while pos < len(m):
+            rec = _record_at(m, pos)
+            if rec is None:
+                # A writer that died mid-append leaves a torn record that
+                # later appends follow; skip to the next whole record. With
+                # none after it, it may still be being written.
+                nxt = _next_record(m, pos)
+                if nxt is None:
+                    break
+                log.warning("Skipped %d torn bytes at offset %d of %s", nxt - pos, pos, self.path)
+                pos = nxt
+                continue
+            key, entry, pos = rec
+            self.index[key] = entry
+        self._scanned = pos
+        self._map = m
+
+    def _record(self, key):
+        with self._lock:
+            rec = self.index.get(key)
+            if rec is None:
+                self._sync()
+                rec = self.index.get(key)
+            return rec, self._map
+
+    def get(self, key):
+        # (data, fresh_until) or None; entries past the stale window are gone.
+        rec, m = self._record(key)
+        if rec is None:
+            return None
+        start, dlen, crc, fresh_until = rec
+        if time.time() >= fresh_until + self.stale_ttl:
+            return None
+        payload = memoryview(m)[start:start + dlen]
+        if zlib.crc32(payload) != crc:
+            log.warning("Corrupt snapshot record for %s in %s", key, self.path)
+            return None
+        return json.loads(zlib.decompress(payload)), fresh_until
+
+    def _append(self, key, payload, crc, fresh_until):
+        kb = key.encode()
+        with self._lock:
+            if self._writer is None or os.fstat(self._writer).st_ino != os.stat(self.path).st_ino:
+                if self._writer is not None:
+                    os.close(self._writer)
+                self._writer = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            os.write(self._writer, REC.pack(len(kb), len(payload), crc, fresh_until) + kb + payload)
+
+    def put(self, key, data, ttl):
+        payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode(), 6)
+        self._append(key, payload, zlib.crc32(payload), time.time() + ttl)
+
+    def records(self):
+        # Latest live record per key: (key, payload, crc, fresh_until).
+        with self._lock:
+            self._sync()
+            index, m = dict(self.index), self._map
+        now = time.time()
+        for key, (start, dlen, crc, fresh_until) in index.items():
+            if now < fresh_until + self.stale_ttl:
+                yield key, m[start:start + dlen], crc, fresh_until
+
+    def export(self, dest):
+        dest = Path(dest)
+        tmp = dest.with_name(dest.name + f".{os.getpid()}.tmp")
+        count = 0
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            for key, payload, crc, fresh_until in self.records():
+                kb = key.encode()
+                f.write(REC.pack(len(kb), len(payload), crc, fresh_until) + kb + payload)
+                count += 1
+        os.replace(tmp, dest)
+        return count
+
+    def compact(self):
+        # Rewrites the file with one live record per key. Appends made by
+        # other processes while this runs are lost, so run it off-peak.
+        with self._lock:
+            before = os.path.getsize(self.path)
+            count = self.export(self.path)
+            self._open()
+            return count, before, os.path.getsize(self.path)
+
+    def merge(self, other, ttl=None):
+        # Import every live record of `other` that is newer than ours. With
+        # `ttl`, imported records are restamped fresh for that long.
+        with self._lock:
+            self._sync()
+            mine = dict(self.index)
+        count = 0
+        for key, payload, crc, fresh_until in other.records():
+            if ttl is not None:
+                fresh_until = time.time() + ttl
+            if key not in mine or mine[key][3] < fresh_until:
+                self._append(key, payload, crc, fresh_until)
+                count += 1
+        return count
+
+    def stats(self):
+        with self._lock:
+            self._sync()
+            now = time.time()
+            return {
+                "path": str(self.path),
+                "bytes": os.path.getsize(self.path),
+                "keys": len(self.index),
+                "fresh": sum(1 for r in self.index.values() if now < r[3]),
+                "expired": sum(1 for r in self.index.values() if now >= r[3] + self.stale_ttl),
+            }
+
+_store = None
+_store_lock = threading.Lock()
+_disabled = False
+
+def get_store():
+    # None when SNAPSHOT_PATH is empty or the file cannot be used.
+    global _store, _disabled
+    if _store is None and not _disabled:
+        with _store_lock:
+            if _store is None and not _disabled:
+                path = getattr(settings, "SNAPSHOT_PATH", "")
+                try:
+                    if path:
+                        _store = Snapshot(path, getattr(settings, "SNAPSHOT_STALE_TTL", 30 * 86400))
+                except (OSError, ValueError) as e:
+                    log.warning("Response snapshot disabled: %s", e)
+                _disabled = _store is None
+    return _store
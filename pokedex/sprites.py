@@ -0,0 +1,145 @@
+import io
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+from . import scheduler, services
+from .errors import PokeAPIError
+from .http_client import CircuitBreaker, get_client
+from .middleware import StaticFilesMiddleware
+from .tiered_cache import get_tier
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails fall back to the full artwork
+    Image = None
+
+# Local proxy for official artwork. The first request for
+# /sprites/<id>/<variant> fetches the PNG once, stores it under
+# SPRITE_ROOT/sprites/<id>/ and derives WebP thumbnails (Pillow, optional).
+# SPRITE_ROOT is also WHITENOISE_ROOT: files on disk at startup are served by
+# WhiteNoise as immutable before the request reaches Django, and ensure()
+# registers later ones with it, so views.sprite_view sees only the first hit
+# per file and worker. List pages prefetch their own and the next page's
+# thumbnails in the background.
+
+log = logging.getLogger(__name__)
+
+if Image is None:
+    log.warning("Pillow is not installed: sprite thumbnails fall back to the full artwork")
+
+FULL = "full.png"
+
+_breaker = CircuitBreaker(threshold=5, reset_timeout=30)
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sprites")
+_queue_lock = threading.Lock()
+_queued = set()  # Pokémon ids waiting for or being given a thumbnail
+_jobs = 0  # prefetch jobs submitted and not yet finished
+
+def root():
+    return Path(getattr(settings, "SPRITE_ROOT", settings.BASE_DIR / ".cache" / "public"))
+
+def thumb_variant(size=None):
+    size = size or getattr(settings, "SPRITE_THUMB_SIZES", (96,))[0]
+    return f"{size}.webp" if Image is not None else FULL
+
+def variants():
+    sizes = getattr(settings, "SPRITE_THUMB_SIZES", (96,)) if Image is not None else ()
+    return {FULL} | {thumb_variant(s) for s in sizes}
+
+def path_for(pokemon_id, variant):
+    return root() / "sprites" / str(pokemon_id) / variant
+
+def url_for(pokemon_id, variant=FULL):
+    return reverse("sprite", args=[pokemon_id, variant])
+
+def _write(path, data):
+    # Unique temp file per call: the full image and a thumbnail of the same
+    # Pokémon can be built by two threads at once.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _thumbnail(source, size):
+    with Image.open(source) as im:
+        im.thumbnail((size, size))
+        buf = io.BytesIO()
+        im.save(buf, "WEBP", quality=80, method=4)
+    return buf.getvalue()
+
+def _build(pokemon_id, variant):
+    full = path_for(pokemon_id, FULL)
+    if not full.exists():
+        url = services.get_card(pokemon_id).image
+        if not url:
+            raise PokeAPIError(f"No artwork for Pokémon {pokemon_id}")
+        _write(full, get_client().get_bytes(url, breaker=_breaker))
+    path = path_for(pokemon_id, variant)
+    if variant != FULL:
+        _write(path, _thumbnail(full, int(variant.split(".")[0])))
+    return path
+
+def ensure(pokemon_id, variant=FULL):
+    # Path of the variant on disk, fetching and resizing on first use.
+    if variant not in variants():
+        raise ValueError(f"Unknown sprite variant {variant}")
+    path = path_for(pokemon_id, variant)
+    if not path.exists():
+        get_tier().coalesce(f"sprite:{pokemon_id}:{variant}", lambda: _build(pokemon_id, variant))
+    StaticFilesMiddleware.add_file(path)
+    return path
+
+def _claim(cards):
+    # Ids of `cards` that are neither on disk nor already queued, now marked queued.
+    ids = [c.id for c in cards if not path_for(c.id, thumb_variant()).exists()]
+    with _queue_lock:
+        ids = [i for i in dict.fromkeys(ids) if i not in _queued]
+        _queued.update(ids)
+    return ids
+
+def _prefetch(ids, next_page=None):
+    global _jobs
+    try:
+        with scheduler.priority(scheduler.PREFETCH):
+            if next_page is not None:
+                ids += _claim(next_page()["results"])
+            for pokemon_id in ids:
+                ensure(pokemon_id, thumb_variant())
+    except Exception as e:
+        log.warning("Sprite prefetch failed: %s", e)
+    finally:
+        with _queue_lock:
+            _queued.difference_update(ids)
+            _jobs -= 1
+        connection.close()
+
+def prefetch(cards, next_page=None):
+    # Fire-and-forget: thumbnails for `cards`, then for the cards returned by
+    # next_page() (one page ahead), skipping anything already on disk or
+    # queued. At most SPRITE_PREFETCH_JOBS jobs wait; beyond that renders
+    # don't queue anything and first views build their own thumbnails.
+    global _jobs
+    if not getattr(settings, "SPRITE_PREFETCH", True):
+        return
+    with _queue_lock:
+        if _jobs >= getattr(settings, "SPRITE_PREFETCH_JOBS", 8):
+            return
+        _jobs += 1
+    ids = _claim(cards)
+    if not ids and next_page is None:
+        with _queue_lock:
+            _jobs -= 1
+        return
+    _pool.submit(_prefetch, ids, next_page)
@@ -0,0 +1,46 @@
+from array import array
+from operator import add
+
+# Batch team analytics for api.teams_api. The distinct Pokémon of every
+# team are resolved once; their base stats go into one dense row-major
+# array (Pokémon x STATS) and their defensive type vectors are looked up
+# once, so scoring a team is six row additions and a coverage summary.
+
+STATS = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+
+class StatMatrix:
+    def __init__(self, cards):
+        # cards: {name: PokemonCard}
+        width = len(STATS)
+        self.row = {}
+        self.values = array("i", [0]) * (len(cards) * width)
+        for name, card in cards.items():
+            base = len(self.row) * width
+            self.row[name] = base
+            stats = dict(card.stats)
+            self.values[base:base + width] = array("i", (stats.get(s, 0) for s in STATS))
+
+    def totals(self, names):
+        width = len(STATS)
+        acc = [0] * width
+        for name in names:
+            base = self.row[name]
+            acc = list(map(add, acc, self.values[base:base + width]))
+        return acc
+
+def analyze(teams, cards, chart):
+    # Yields one result dict per team, in order; names that did not resolve
+    # are reported under "missing" and left out of the numbers.
+    matrix = StatMatrix(cards)
+    vectors = {name: chart.vector(card.types) for name, card in cards.items()}
+    for team in teams:
+        found = [n for n in team if n in cards]
+        totals = matrix.totals(found)
+        yield {
+            "team": team,
+            "missing": [n for n in team if n not in cards],
+            "average_stats": {s: round(t / len(found), 2) for s, t in zip(STATS, totals)} if found else {},
+            "total_stats": dict(zip(STATS, totals)),
+            "base_stat_total": sum(totals),
+            "coverage": chart.summarize([vectors[n] for n in found if vectors[n] is not None]),
+        }
@@ -1,16 +1,28 @@
 from django import template
 import json
+from pokedex import sprites as sprite_cache
+from pokedex.cards import PokemonCard
 register = template.Library()
 
 @register.filter
 def sprite_url(p):
+    if isinstance(p, PokemonCard):
+        return sprite_cache.url_for(p.id)
     if not isinstance(p, dict):
         return None
+    if p.get("id"):
+        return sprite_cache.url_for(p["id"])
     sprites = p.get("sprites") or {}
     other = sprites.get("other") or {}
     off = other.get("official-artwork") or {}
     return off.get("front_default") or sprites.get("front_default")
 
+@register.filter
+def sprite_thumb(p):
+    if isinstance(p, PokemonCard):
+        return sprite_cache.url_for(p.id, sprite_cache.thumb_variant())
+    return sprite_url(p)
+
 @register.filter
 def pretty_json(obj):
     try:
@@ -0,0 +1,16 @@
+import json
+from django.test import SimpleTestCase
+from pokedex.api import _batch_body
+from pokedex.cards import PokemonCard
+
+def card(id, name):
+    return PokemonCard(id, name, None, ("grass",), 7, 69, (("hp", 45),), ("overgrow",))
+
+class BatchBodyTests(SimpleTestCase):
+    def test_same_pokemon_under_two_ids_is_listed_once(self):
+        bulbasaur = card(1, "bulbasaur")
+        cards = {"1": bulbasaur, "bulbasaur": bulbasaur, "pikachu": card(25, "pikachu")}
+        body = json.loads(_batch_body(["1", "pikachu", "bulbasaur", "nope"], cards, None))
+        self.assertEqual(body["count"], 2)
+        self.assertEqual([c["name"] for c in body["results"]], ["bulbasaur", "pikachu"])
+        self.assertEqual(body["missing"], ["nope"])
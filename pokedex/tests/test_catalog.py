@@ -0,0 +1,18 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from pokedex import catalog
+from pokedex.models import Pokemon
+
+@override_settings(POKEDEX_LOCAL_CATALOG=True)
+class CatalogReadyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_partial_sync_is_not_ready(self):
+        Pokemon.objects.create(id=1, name="bulbasaur")
+        self.assertFalse(catalog.ready())
+
+    def test_ready_after_complete_sync(self):
+        Pokemon.objects.create(id=1, name="bulbasaur")
+        catalog.mark_complete(1)
+        self.assertTrue(catalog.ready())
@@ -0,0 +1,90 @@
+import pickle
+from unittest import mock
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from pokedex import services
+from pokedex.evolution import FlatChain
+from pokedex.tiered_cache import TieredCache
+
+SPECIES = "https://pokeapi.co/api/v2/pokemon-species/{}/"
+
+def node(name, id, evolves_to=(), trigger=None, **condition):
+    details = [dict(trigger={"name": trigger}, **condition)] if trigger else []
+    return {
+        "species": {"name": name, "url": SPECIES.format(id)},
+        "evolution_details": details,
+        "evolves_to": list(evolves_to),
+    }
+
+BULBASAUR = {"id": 1, "chain": node("bulbasaur", 1, [
+    node("ivysaur", 2, [node("venusaur", 3, trigger="level-up", min_level=32)],
+         trigger="level-up", min_level=16),
+])}
+EEVEE = {"id": 67, "chain": node("eevee", 133, [
+    node("vaporeon", 134, trigger="use-item", item={"name": "water-stone"}),
+    node("jolteon", 135, trigger="use-item", item={"name": "thunder-stone"}),
+    node("espeon", 196, trigger="level-up", min_happiness=160, time_of_day="day", gender=None),
+])}
+
+class FlatChainTests(SimpleTestCase):
+    def test_linear_chain(self):
+        chain = FlatChain.from_api(BULBASAUR)
+        self.assertEqual(chain.id, 1)
+        self.assertEqual(chain.names, ("bulbasaur", "ivysaur", "venusaur"))
+        self.assertEqual(chain.species_ids, (1, 2, 3))
+        self.assertEqual(chain.stages, (("bulbasaur",), ("ivysaur",), ("venusaur",)))
+        self.assertEqual(chain.triggers, (
+            ("bulbasaur", "ivysaur", "level-up", (("min_level", 16),)),
+            ("ivysaur", "venusaur", "level-up", (("min_level", 32),)),
+        ))
+
+    def test_branching_chain(self):
+        chain = FlatChain.from_api(EEVEE)
+        self.assertEqual(chain.names, ("eevee", "vaporeon", "jolteon", "espeon"))
+        self.assertEqual(chain.stages, (("eevee",), ("vaporeon", "jolteon", "espeon")))
+        self.assertEqual(chain.as_dict()["triggers"], [
+            {"from": "eevee", "to": "vaporeon", "trigger": "use-item", "item": "water-stone"},
+            {"from": "eevee", "to": "jolteon", "trigger": "use-item", "item": "thunder-stone"},
+            {"from": "eevee", "to": "espeon", "trigger": "level-up", "min_happiness": 160, "time_of_day": "day"},
+        ])
+        self.assertEqual(chain.members(), chain.names + ("133", "134", "135", "196"))
+
+    def test_empty_chain(self):
+        chain = FlatChain.from_api(None)
+        self.assertEqual((chain.id, chain.names, chain.stages), (None, (), ()))
+
+    def test_pickle_round_trip(self):
+        chain = FlatChain.from_api(EEVEE)
+        self.assertEqual(pickle.loads(pickle.dumps(chain)), chain)
+
+class ChainIndexTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        tier = TieredCache("default", lru_size=16)
+        for target, value in (("get_tier", lambda: tier), ("_fetch", self.fetch)):
+            patcher = mock.patch.object(services, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(services.catalog, "ready", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.species_calls = []
+        self.fetched = []
+
+    def fetch(self, url, params=None):
+        self.fetched.append(url)
+        return EEVEE
+
+    def species(self, identifier):
+        self.species_calls.append(identifier)
+        return {"evolution_chain": {"url": "https://pokeapi.co/api/v2/evolution-chain/67/"}}
+
+    def test_mid_chain_member_indexes_the_rest(self):
+        with mock.patch.object(services, "get_pokemon_species", self.species):
+            first = services.get_evolution_chain_by_pokemon("Jolteon")
+            self.assertEqual(first.id, 67)
+            self.assertEqual(self.species_calls, ["Jolteon"])
+            for member in ("eevee", "espeon", "134"):
+                self.assertEqual(services.get_evolution_chain_by_pokemon(member), first)
+        self.assertEqual(self.species_calls, ["Jolteon"])
+        self.assertEqual(len(self.fetched), 1)
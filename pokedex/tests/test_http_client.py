@@ -0,0 +1,97 @@
+import email.utils
+import time
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase
+from pokedex.errors import CircuitOpenError, PokeAPIError
+from pokedex.http_client import CircuitBreaker, PokeAPIClient, _retry_after
+
+def response(status=200, headers=None, body=b"{}"):
+    return SimpleNamespace(status_code=status, headers=headers or {}, content=body,
+                           text=body.decode(), json=lambda: {"ok": True})
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+        self.assertEqual([breaker.failure() for _ in range(3)], [False, False, True])
+        self.assertEqual(breaker.state, breaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_half_open_trial_success_closes(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, breaker.HALF_OPEN)
+        breaker.success()
+        self.assertEqual((breaker.state, breaker.failures), (breaker.CLOSED, 0))
+
+    def test_half_open_trial_failure_reopens(self):
+        breaker = CircuitBreaker(threshold=5, reset_timeout=60)
+        breaker.state, breaker.opened_at = breaker.OPEN, time.monotonic() - 60
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.failure()
+        self.assertEqual(breaker.state, breaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_lost_half_open_trial_times_out(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+        breaker.failure()
+        with mock.patch("pokedex.http_client.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+        with mock.patch("pokedex.http_client.time.monotonic", return_value=time.monotonic() + 122):
+            self.assertTrue(breaker.allow())
+
+class RetryAfterTests(SimpleTestCase):
+    def test_seconds(self):
+        self.assertEqual(_retry_after(response(503, {"Retry-After": "2"}), 5), 2.0)
+        self.assertEqual(_retry_after(response(503, {"Retry-After": "120"}), 5), 5)
+
+    def test_http_date(self):
+        when = email.utils.formatdate(time.time() + 3, usegmt=True)
+        self.assertAlmostEqual(_retry_after(response(503, {"Retry-After": when}), 5), 3, delta=1.1)
+        past = email.utils.formatdate(time.time() - 60, usegmt=True)
+        self.assertEqual(_retry_after(response(503, {"Retry-After": past}), 5), 0.0)
+
+    def test_missing_or_garbage(self):
+        self.assertIsNone(_retry_after(response(503), 5))
+        self.assertIsNone(_retry_after(response(503, {"Retry-After": "soon"}), 5))
+
+class ClientRetryTests(SimpleTestCase):
+    def setUp(self):
+        self.client = PokeAPIClient(retries=2, backoff=0.01, max_wait=5,
+                                    breaker=CircuitBreaker(threshold=1, reset_timeout=60))
+        self.waits = []
+        patcher = mock.patch("pokedex.http_client.time.sleep", self.waits.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def serve(self, *responses):
+        return mock.patch.object(self.client.session, "get", side_effect=list(responses))
+
+    def test_retries_429_and_5xx_then_succeeds(self):
+        with self.serve(response(429, {"Retry-After": "1"}), response(502), response(200)):
+            self.assertEqual(self.client.get_json("http://x/"), {"ok": True})
+        self.assertEqual(self.waits[0], 1.0)
+        self.assertEqual(self.client.counters["retries"], 2)
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_garbage_retry_after_falls_back_to_backoff(self):
+        with self.serve(response(503, {"Retry-After": "soon"}), response(200)):
+            self.assertEqual(self.client.get_json("http://x/"), {"ok": True})
+        self.assertLessEqual(self.waits[0], 0.01)
+
+    def test_exhausted_retries_open_the_circuit(self):
+        with self.serve(*[response(503, {"Retry-After": "soon"})] * 3):
+            with self.assertRaises(PokeAPIError):
+                self.client.get_json("http://x/")
+        self.assertEqual(self.client.counters["circuit_opened"], 1)
+        with self.assertRaises(CircuitOpenError):
+            self.client.get_json("http://x/")
+
+    def test_client_errors_are_not_retried(self):
+        with self.serve(response(404, body=b"Not Found")):
+            with self.assertRaises(PokeAPIError):
+                self.client.get_json("http://x/")
+        self.assertEqual(self.client.counters["retries"], 0)
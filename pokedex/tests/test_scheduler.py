@@ -0,0 +1,162 @@
+import asyncio
+import tempfile
+import threading
+import time
+from pathlib import Path
+from django.test import SimpleTestCase
+from pokedex.scheduler import BACKGROUND, PREFETCH, USER, Scheduler, TokenBucket, priority
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(10, 2)
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        wait = bucket.take()
+        self.assertGreater(wait, 0.05)
+        self.assertLessEqual(wait, 0.1)
+
+    def test_refills_over_time(self):
+        bucket = TokenBucket(50, 1)
+        self.assertEqual(bucket.take(), 0)
+        time.sleep(0.03)
+        self.assertEqual(bucket.take(), 0)
+
+    def test_file_is_shared_between_buckets(self):
+        # Two buckets on one file stand in for two workers.
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "upstream.bucket")
+            a, b = TokenBucket(1, 2, path), TokenBucket(1, 2, path)
+            self.assertEqual(a.take(), 0)
+            self.assertEqual(b.take(), 0)
+            self.assertGreater(a.take(), 0)
+            self.assertGreater(b.take(), 0)
+
+    def test_unusable_file_falls_back_to_process_bucket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            blocker = Path(tmp) / "file"
+            blocker.write_text("")
+            bucket = TokenBucket(10, 1, str(blocker / "upstream.bucket"))
+            with self.assertLogs("pokedex.scheduler", "WARNING"):
+                self.assertEqual(bucket.take(), 0)
+            self.assertIsNone(bucket.path)
+
+class SchedulerTests(SimpleTestCase):
+    def drained(self, rate=20):
+        scheduler = Scheduler(TokenBucket(rate, 1))
+        scheduler.bucket.take()
+        return scheduler
+
+    def test_without_bucket_never_waits(self):
+        scheduler = Scheduler()
+        t0 = time.perf_counter()
+        for _ in range(100):
+            scheduler.acquire()
+        self.assertLess(time.perf_counter() - t0, 0.05)
+
+    def test_higher_priority_goes_first(self):
+        scheduler, order = self.drained(), []
+
+        def run(level, tag):
+            with priority(level):
+                scheduler.acquire()
+            order.append(tag)
+
+        background = [threading.Thread(target=run, args=(BACKGROUND, f"bg{i}")) for i in range(3)]
+        for t in background:
+            t.start()
+        time.sleep(0.02)
+        user = [threading.Thread(target=run, args=(USER, f"user{i}")) for i in range(2)]
+        prefetch = threading.Thread(target=run, args=(PREFETCH, "prefetch"))
+        for t in user + [prefetch]:
+            t.start()
+        time.sleep(0.01)
+        self.assertEqual(scheduler.depth(), {"user": 2, "prefetch": 1, "background": 3})
+        for t in background + user + [prefetch]:
+            t.join()
+        self.assertEqual(order[:3], ["user0", "user1", "prefetch"])
+        self.assertEqual(sorted(order[3:]), ["bg0", "bg1", "bg2"])
+        self.assertEqual(scheduler.depth(), {"user": 0, "prefetch": 0, "background": 0})
+
+    def test_identical_fetches_share_one_call(self):
+        scheduler, calls, results = Scheduler(), [], []
+        gate = threading.Event()
+
+        def fn():
+            calls.append(1)
+            gate.wait(1)
+            return {"name": "pikachu"}
+
+        threads = [threading.Thread(target=lambda: results.append(scheduler.fetch("url", fn))) for _ in range(6)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        gate.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"name": "pikachu"}] * 6)
+        self.assertEqual(scheduler._inflight, {})
+
+    def test_fetch_error_reaches_followers(self):
+        scheduler, errors = Scheduler(), []
+        gate = threading.Event()
+
+        def fn():
+            gate.wait(1)
+            raise ValueError("boom")
+
+        def call():
+            try:
+                scheduler.fetch("url", fn)
+            except ValueError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        gate.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, ["boom"] * 3)
+
+    def test_user_follower_promotes_background_fetch(self):
+        scheduler, order = self.drained(rate=10), []
+        started = threading.Event()
+
+        def waiting_background():
+            with priority(BACKGROUND):
+                started.set()
+                scheduler.acquire()
+            order.append("background")
+
+        def fetch(level):
+            with priority(level):
+                scheduler.fetch("url", lambda: order.append("fetch") or "data")
+
+        blocker = threading.Thread(target=waiting_background)
+        blocker.start()
+        started.wait()
+        time.sleep(0.01)
+        leader = threading.Thread(target=fetch, args=(BACKGROUND,))
+        leader.start()
+        time.sleep(0.01)
+        self.assertEqual(scheduler.depth()["background"], 2)
+        fetch(USER)
+        blocker.join()
+        leader.join()
+        self.assertEqual(order, ["fetch", "background"])
+
+    def test_async_fetches_share_one_call(self):
+        scheduler, calls = Scheduler(TokenBucket(100, 10)), []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return 7
+
+        async def main():
+            return await asyncio.gather(*[scheduler.afetch("url", fn) for _ in range(5)])
+
+        self.assertEqual(asyncio.run(main()), [7] * 5)
+        self.assertEqual(len(calls), 1)
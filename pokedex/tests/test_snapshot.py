@@ -0,0 +1,115 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+from django.test import SimpleTestCase
+from pokedex.snapshot import MAGIC, REC, Snapshot
+
+class SnapshotTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "pokeapi.snap"
+
+    def test_put_then_get(self):
+        store = Snapshot(self.path)
+        store.put("poke:a", {"name": "pikachu", "types": ["electric"]}, 60)
+        data, fresh_until = store.get("poke:a")
+        self.assertEqual(data, {"name": "pikachu", "types": ["electric"]})
+        self.assertGreater(fresh_until, time.time())
+        self.assertIsNone(store.get("poke:missing"))
+
+    def test_reload_sees_earlier_appends(self):
+        Snapshot(self.path).put("poke:a", {"id": 25}, 60)
+        self.assertEqual(Snapshot(self.path).get("poke:a")[0], {"id": 25})
+
+    def test_reader_picks_up_other_writers(self):
+        reader, writer = Snapshot(self.path), Snapshot(self.path)
+        self.assertIsNone(reader.get("poke:a"))
+        writer.put("poke:a", {"id": 1}, 60)
+        writer.put("poke:a", {"id": 2}, 60)
+        self.assertEqual(reader.get("poke:a")[0], {"id": 2})
+
+    def test_stale_window(self):
+        store = Snapshot(self.path, stale_ttl=60)
+        store.put("poke:stale", {"id": 1}, -30)
+        store.put("poke:gone", {"id": 2}, -120)
+        data, fresh_until = store.get("poke:stale")
+        self.assertLess(fresh_until, time.time())
+        self.assertEqual(data, {"id": 1})
+        self.assertIsNone(store.get("poke:gone"))
+
+    def test_partial_trailing_record_is_ignored(self):
+        store = Snapshot(self.path)
+        store.put("poke:a", {"id": 1}, 60)
+        with open(self.path, "ab") as f:
+            f.write(REC.pack(6, 1000, 0, time.time() + 60) + b"poke:b" + b"x" * 10)
+        reader = Snapshot(self.path)
+        self.assertEqual(reader.get("poke:a")[0], {"id": 1})
+        self.assertIsNone(reader.get("poke:b"))
+
+    def test_torn_record_mid_file_is_skipped(self):
+        store = Snapshot(self.path)
+        store.put("poke:a", {"id": 1}, 60)
+        with open(self.path, "ab") as f:
+            f.write(REC.pack(6, 1000, 0, time.time() + 60) + b"poke:b" + b"x" * 10)
+        reader = Snapshot(self.path)
+        store.put("poke:c", {"id": 3}, 60)
+        store.put("poke:d", {"id": 4}, 60)
+        for r in (reader, Snapshot(self.path)):
+            self.assertEqual(r.get("poke:a")[0], {"id": 1})
+            self.assertIsNone(r.get("poke:b"))
+            self.assertEqual(r.get("poke:c")[0], {"id": 3})
+            self.assertEqual(r.get("poke:d")[0], {"id": 4})
+
+    def test_torn_header_mid_file_is_skipped(self):
+        store = Snapshot(self.path)
+        store.put("poke:a", {"id": 1}, 60)
+        with open(self.path, "ab") as f:
+            f.write(REC.pack(6, 1000, 0, 0)[:5])
+        store.put("poke:c", {"id": 3}, 60)
+        self.assertEqual(Snapshot(self.path).get("poke:c")[0], {"id": 3})
+
+    def test_corrupt_payload_is_skipped_by_length(self):
+        store = Snapshot(self.path)
+        store.put("poke:a", {"id": 1}, 60)
+        store.put("poke:b", {"id": 2}, 60)
+        data = bytearray(self.path.read_bytes())
+        data[len(MAGIC) + REC.size + len("poke:a")] ^= 0xFF
+        self.path.write_bytes(bytes(data))
+        reader = Snapshot(self.path)
+        self.assertIsNone(reader.get("poke:a"))
+        self.assertEqual(reader.get("poke:b")[0], {"id": 2})
+
+    def test_compact_keeps_latest_and_readers_reopen(self):
+        store, reader = Snapshot(self.path), Snapshot(self.path)
+        for i in range(5):
+            store.put("poke:a", {"id": i}, 60)
+        store.put("poke:b", {"id": 9}, 60)
+        self.assertEqual(reader.get("poke:a")[0], {"id": 4})
+        count, before, after = store.compact()
+        self.assertEqual(count, 2)
+        self.assertLess(after, before)
+        store.put("poke:c", {"id": 3}, 60)
+        self.assertEqual(reader.get("poke:c")[0], {"id": 3})
+        self.assertEqual(reader.get("poke:a")[0], {"id": 4})
+
+    def test_merge_imports_newer_records(self):
+        other = Snapshot(Path(self.tmp.name) / "other.snap")
+        store = Snapshot(self.path)
+        store.put("poke:a", {"id": 1}, 600)
+        other.put("poke:a", {"id": 2}, 60)
+        other.put("poke:b", {"id": 3}, 60)
+        self.assertEqual(store.merge(other), 1)
+        self.assertEqual(store.get("poke:a")[0], {"id": 1})
+        self.assertEqual(store.get("poke:b")[0], {"id": 3})
+
+    def test_rejects_foreign_files(self):
+        self.path.write_bytes(b"not a snapshot at all")
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+
+    def test_new_file_starts_with_magic(self):
+        Snapshot(self.path)
+        self.assertEqual(self.path.read_bytes(), MAGIC)
+        self.assertEqual(os.path.getsize(self.path), len(MAGIC))
@@ -0,0 +1,66 @@
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from pokedex import sprites
+from pokedex.middleware import StaticFilesMiddleware
+
+class PrefetchTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = override_settings(SPRITE_ROOT=tmp.name, SPRITE_PREFETCH=True, SPRITE_PREFETCH_JOBS=2)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.submitted = []
+        patcher = mock.patch.object(sprites._pool, "submit", lambda fn, *args: self.submitted.append(args))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.reset)
+
+    def reset(self):
+        sprites._queued.clear()
+        sprites._jobs = 0
+
+    def cards(self, *ids):
+        return [SimpleNamespace(id=i) for i in ids]
+
+    def test_queued_ids_are_not_queued_again(self):
+        sprites.prefetch(self.cards(1, 2, 2))
+        sprites.prefetch(self.cards(2, 3))
+        self.assertEqual([ids for ids, _ in self.submitted], [[1, 2], [3]])
+
+    def test_ids_on_disk_are_skipped(self):
+        path = sprites.path_for(4, sprites.thumb_variant())
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"")
+        sprites.prefetch(self.cards(4))
+        self.assertEqual(self.submitted, [])
+        self.assertEqual(sprites._jobs, 0)
+
+    def test_pending_jobs_are_capped(self):
+        for i in range(5):
+            sprites.prefetch(self.cards(i))
+        self.assertEqual(len(self.submitted), 2)
+        with mock.patch.object(sprites, "ensure"):
+            sprites._prefetch(*self.submitted[0])
+        self.assertEqual(sprites._jobs, 1)
+        self.assertNotIn(0, sprites._queued)
+        sprites.prefetch(self.cards(9))
+        self.assertEqual(len(self.submitted), 3)
+
+class WhiteNoiseRegistrationTests(SimpleTestCase):
+    def test_sprite_written_after_startup_is_served_by_whitenoise(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        with override_settings(SPRITE_ROOT=tmp.name, WHITENOISE_ROOT=tmp.name, WHITENOISE_AUTOREFRESH=False):
+            mw = StaticFilesMiddleware(lambda request: HttpResponse("view"))
+            path = sprites.path_for(7, sprites.FULL)
+            path.parent.mkdir(parents=True)
+            path.write_bytes(b"png")
+            self.assertEqual(mw(RequestFactory().get("/sprites/7/full.png")).content, b"view")
+            self.assertEqual(sprites.ensure(7), path)
+            response = mw(RequestFactory().get("/sprites/7/full.png"))
+        self.assertEqual(b"".join(response.streaming_content), b"png")
+        self.assertIn("immutable", response["Cache-Control"])
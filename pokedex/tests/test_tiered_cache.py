@@ -0,0 +1,110 @@
+import threading
+import time
+from unittest import mock
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from pokedex.tiered_cache import TieredCache, hashed_key
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.tier = TieredCache("default", lru_size=16)
+
+    def drain(self):
+        self.tier._refresher.shutdown(wait=True)
+
+    def test_concurrent_misses_share_one_load(self):
+        calls, results = [], []
+        gate = threading.Event()
+
+        def loader():
+            calls.append(1)
+            gate.wait(1)
+            return "pikachu"
+
+        threads = [threading.Thread(target=lambda: results.append(self.tier.get("k", loader, 60))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        gate.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["pikachu"] * 8)
+
+    def test_loader_error_reaches_every_waiter(self):
+        gate = threading.Event()
+        errors = []
+
+        def loader():
+            gate.wait(1)
+            raise RuntimeError("upstream down")
+
+        def call():
+            try:
+                self.tier.get("k", loader, 60)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        gate.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, ["upstream down"] * 4)
+        self.assertIsNone(self.tier.get_entry("k"))
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        self.tier.set("k", "old", -1)
+        version = self.tier.version()
+        self.assertEqual(self.tier.get("k", lambda: "new", 60), "old")
+        self.drain()
+        data, fresh_until = self.tier.get_entry("k")
+        self.assertEqual(data, "new")
+        self.assertGreater(fresh_until, time.time())
+        self.assertEqual(self.tier.version(), version + 1)
+
+    def test_failed_refresh_keeps_stale_copy(self):
+        self.tier.set("k", "old", -1)
+
+        def loader():
+            raise RuntimeError("upstream down")
+
+        with self.assertLogs("pokedex.tiered_cache", "WARNING"):
+            self.assertEqual(self.tier.get("k", loader, 60), "old")
+            self.drain()
+        self.assertEqual(self.tier.get_entry("k")[0], "old")
+        self.assertIsNone(caches["default"].get("k:refreshing"))
+
+    def test_one_refresh_per_key(self):
+        self.tier.set("k", "old", -1)
+        calls = []
+        gate = threading.Event()
+
+        def loader():
+            calls.append(1)
+            gate.wait(1)
+            return "new"
+
+        for _ in range(5):
+            self.assertEqual(self.tier.get("k", loader, 60), "old")
+        gate.set()
+        self.drain()
+        self.assertEqual(len(calls), 1)
+
+    def test_refresh_lock_outlasts_a_slow_load(self):
+        gate = threading.Event()
+        self.tier.refresh("k", lambda: gate.wait(1) or "new", 60, lock_timeout=600)
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=time.time() + 300):
+            self.assertFalse(caches["default"].add("k:refreshing", 1))
+        gate.set()
+        self.drain()
+        self.assertIsNone(caches["default"].get("k:refreshing"))
+
+    def test_hashed_key_fits_memcached(self):
+        key = hashed_key("poke:https://pokeapi.co/api/v2/pokemon/:{'offset': 0}" + "x" * 300, "", 1)
+        self.assertLessEqual(len(key), 250)
+        self.assertNotIn(" ", key)
+        self.assertEqual(key, hashed_key("poke:https://pokeapi.co/api/v2/pokemon/:{'offset': 0}" + "x" * 300, "", 1))
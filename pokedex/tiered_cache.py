@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import caches
+from . import metrics, scheduler
+
+# Two-level cache in front of PokeAPI: a bounded in-process LRU backed by a
+# shared Django cache alias (file, Redis, memcached... see settings.CACHES).
+# Entries are stored as (data, fresh_until). Past fresh_until they are still
+# served for CACHE_STALE_TTL seconds while one background refresh runs, and
+# concurrent misses for the same key share a single upstream fetch.
+
+log = logging.getLogger(__name__)
+
+def hashed_key(key, key_prefix, version):
+    # KEY_FUNCTION for memcached: logical keys embed URLs, params and search
+    # text (spaces, braces, >250 chars), which memcached rejects.
+    return f"{key_prefix}:{version}:{hashlib.sha1(key.encode()).hexdigest()}"
+
+def _tally(entries, requested):
+    now = time.time()
+    stale = sum(1 for data, fresh_until in entries if now >= fresh_until)
+    if len(entries) > stale:
+        metrics.record("cache_hit", len(entries) - stale)
+    if stale:
+        metrics.record("cache_stale", stale)
+    if requested > len(entries):
+        metrics.record("cache_miss", requested - len(entries))
+
+class LRU:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class TieredCache:
+    VERSION_KEY = "data:version"
+
+    def __init__(self, alias="default", lru_size=2048, stale_ttl=86400, refresh_workers=2):
+        self.alias = alias
+        self.lru = LRU(lru_size)
+        self.stale_ttl = stale_ttl
+        self._inflight = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def get_entry(self, key):
+        entry = self.lru.get(key)
+        if entry is None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self.lru.set(key, entry)
+        _tally([entry] if entry is not None else [], 1)
+        return entry
+
+    def get_entries(self, keys):
+        out, remote = {}, []
+        for key in keys:
+            entry = self.lru.get(key)
+            if entry is None:
+                remote.append(key)
+            else:
+                out[key] = entry
+        if remote:
+            for key, entry in self.shared.get_many(remote).items():
+                self.lru.set(key, entry)
+                out[key] = entry
+        _tally(out.values(), len(keys))
+        return out
+
+    def set(self, key, data, ttl):
+        entry = (data, time.time() + ttl)
+        self.lru.set(key, entry)
+        self.shared.set(key, entry, ttl + self.stale_ttl)
+
+    def remember(self, key, data, ttl):
+        # LRU-only write, so other threads see a batch item before the
+        # batch's single shared-tier set_many lands.
+        self.lru.set(key, (data, time.time() + ttl))
+
+    def set_many(self, items, ttl):
+        fresh_until = time.time() + ttl
+        entries = {key: (data, fresh_until) for key, data in items.items()}
+        for key, entry in entries.items():
+            self.lru.set(key, entry)
+        self.shared.set_many(entries, ttl + self.stale_ttl)
+
+    def delete(self, key):
+        self.lru.delete(key)
+        self.shared.delete(key)
+
+    def version(self):
+        # Bumped whenever refreshed data differs from what was cached, so
+        # anything derived from it (rendered responses) can key on it.
+        return self.shared.get(self.VERSION_KEY, 0)
+
+    def bump_version(self):
+        if not self.shared.add(self.VERSION_KEY, 1, None):
+            self.shared.incr(self.VERSION_KEY)
+
+    def coalesce(self, key, loader):
+        # Run loader() once per key no matter how many threads ask at once.
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+        if not leader:
+            return fut.result()
+        try:
+            result = loader()
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get(self, key, loader, ttl):
+        entry = self.get_entry(key)
+        if entry is not None:
+            data, fresh_until = entry
+            if time.time() >= fresh_until:
+                self.refresh(key, loader, ttl)
+            return data
+
+        def load():
+            data = loader()
+            self.set(key, data, ttl)
+            return data
+
+        return self.coalesce(key, load)
+
+    def refresh(self, key, loader, ttl, lock_timeout=30):
+        # Schedule one background reload for a stale key, across threads via
+        # _refreshing and across processes via an add() lock on the shared
+        # tier. lock_timeout must outlast the slowest load, or other workers
+        # start their own.
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        if not self.shared.add(f"{key}:refreshing", 1, lock_timeout):
+            with self._lock:
+                self._refreshing.discard(key)
+            return
+        self._refresher.submit(self._refresh, key, loader, ttl)
+
+    def _refresh(self, key, loader, ttl):
+        try:
+            old = self.lru.get(key) or self.shared.get(key)
+            with scheduler.priority(scheduler.BACKGROUND):
+                data = self.coalesce(key, loader)
+            self.set(key, data, ttl)
+            if old is None or old[0] != data:
+                self.bump_version()
+        except Exception as e:
+            log.warning("Background refresh of %s failed, keeping stale copy: %s", key, e)
+        finally:
+            self.shared.delete(f"{key}:refreshing")
+            with self._lock:
+                self._refreshing.discard(key)
+
+    # Async counterparts used by aservices. The LRU is in-process and never
+    # blocks; the shared tier goes through Django's async cache API.
+
+    async def aget_entry(self, key):
+        entry = self.lru.get(key)
+        if entry is None:
+            entry = await self.shared.aget(key)
+            if entry is not None:
+                self.lru.set(key, entry)
+        _tally([entry] if entry is not None else [], 1)
+        return entry
+
+    async def aget_entries(self, keys):
+        out = {key: entry for key in keys if (entry := self.lru.get(key)) is not None}
+        remote = [key for key in keys if key not in out]
+        if remote:
+            for key, entry in (await self.shared.aget_many(remote)).items():
+                self.lru.set(key, entry)
+                out[key] = entry
+        _tally(out.values(), len(keys))
+        return out
+
+    async def aset(self, key, data, ttl):
+        entry = (data, time.time() + ttl)
+        self.lru.set(key, entry)
+        await self.shared.aset(key, entry, ttl + self.stale_ttl)
+
+    async def aset_many(self, items, ttl):
+        fresh_until = time.time() + ttl
+        entries = {key: (data, fresh_until) for key, data in items.items()}
+        for key, entry in entries.items():
+            self.lru.set(key, entry)
+        await self.shared.aset_many(entries, ttl + self.stale_ttl)
+
+    async def acoalesce(self, key, aloader):
+        loop = asyncio.get_running_loop()
+        slot = (id(loop), key)
+        fut = self._inflight.get(slot)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        fut = self._inflight[slot] = loop.create_future()
+        try:
+            result = await aloader()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(slot, None)
+
+    async def aget(self, key, aloader, ttl, refresh_loader):
+        # refresh_loader is the blocking twin of aloader, run on the
+        # background refresh pool when a stale entry is served.
+        entry = await self.aget_entry(key)
+        if entry is not None:
+            data, fresh_until = entry
+            if time.time() >= fresh_until:
+                await asyncio.to_thread(self.refresh, key, refresh_loader, ttl)
+            return data
+
+        async def load():
+            data = await aloader()
+            await self.aset(key, data, ttl)
+            return data
+
+        return await self.acoalesce(key, load)
+
+_tier = None
+_tier_lock = threading.Lock()
+
+def get_tier():
+    global _tier
+    if _tier is None:
+        with _tier_lock:
+            if _tier is None:
+                _tier = TieredCache(
+                    alias=getattr(settings, "POKEAPI_CACHE_ALIAS", "default"),
+                    lru_size=getattr(settings, "CACHE_LRU_SIZE", 2048),
+                    stale_ttl=getattr(settings, "CACHE_STALE_TTL", 86400),
+                )
+    return _tier
@@ -0,0 +1,101 @@
+import threading
+import time
+from array import array
+from django.conf import settings
+
+# Type-effectiveness lookup for services.team_coverage. `matrix` is a flat
+# row-major array('f') of attack x defend multipliers; `combos` holds the
+# precomputed defensive vector (one multiplier per attacking type) for every
+# single and dual typing, so scoring a team is a handful of slice lookups.
+
+class TypeChart:
+    def __init__(self, relations):
+        # relations: {defending type name: PokeAPI damage_relations dict}
+        self.names = list(relations)
+        self.index = {n: i for i, n in enumerate(self.names)}
+        n = self.size = len(self.names)
+        self.matrix = array("f", [1.0]) * (n * n)
+        for defend, dr in relations.items():
+            j = self.index[defend]
+            for key, mult in (("double_damage_from", 2.0), ("half_damage_from", 0.5), ("no_damage_from", 0.0)):
+                for x in dr.get(key, []):
+                    if x["name"] in self.index:
+                        self.matrix[self.index[x["name"]] * n + j] = mult
+        self.combo = {}
+        self.combos = array("f")
+        for i in range(n):
+            for j in range(i, n):
+                self.combo[(i, j)] = len(self.combo)
+                self.combos.extend(self._product((i, j) if i != j else (i,)))
+
+    def _product(self, ordinals):
+        n = self.size
+        out = array("f", [1.0]) * n
+        for j in ordinals:
+            for a in range(n):
+                out[a] *= self.matrix[a * n + j]
+        return out
+
+    def vector(self, types):
+        ordinals = sorted({self.index[t] for t in types if t in self.index})
+        if not ordinals:
+            return None
+        if len(ordinals) > 2:
+            return self._product(ordinals)
+        k = self.combo[(ordinals[0], ordinals[-1])]
+        return memoryview(self.combos)[k * self.size:(k + 1) * self.size]
+
+    def multiplier(self, attack, types):
+        vec = self.vector(types)
+        return 1.0 if vec is None or attack not in self.index else vec[self.index[attack]]
+
+    def coverage(self, team_types):
+        # team_types: one list of type names per team member.
+        return self.summarize([v for v in (self.vector(t) for t in team_types) if v is not None])
+
+    def summarize(self, vecs):
+        # Coverage summary from precomputed defensive vectors (see vector()).
+        summary = {}
+        for a, name in enumerate(self.names):
+            col = [v[a] for v in vecs]
+            summary[name] = {
+                "weak": sum(1 for m in col if m > 1),
+                "resist": sum(1 for m in col if 0 < m < 1),
+                "immune": sum(1 for m in col if m == 0),
+            }
+        return summary
+
+    def coverage_many(self, teams):
+        return [self.coverage(team_types) for team_types in teams]
+
+    def rows(self):
+        n = self.size
+        return [self.matrix[a * n:(a + 1) * n].tolist() for a in range(n)]
+
+_lock = threading.Lock()
+_chart = None
+_built_at = 0.0
+
+def current():
+    if _chart is not None and time.monotonic() - _built_at < getattr(settings, "CACHE_TTL", 3600):
+        return _chart
+    return None
+
+def install(relations):
+    global _chart, _built_at
+    _chart = TypeChart(relations)
+    _built_at = time.monotonic()
+    return _chart
+
+def get_chart(loader):
+    # `loader` returns {type name: damage_relations}; rebuilt after CACHE_TTL.
+    chart = current()
+    if chart is not None:
+        return chart
+    with _lock:
+        chart = current()
+        return chart if chart is not None else install(loader())
+
+def reset():
+    global _chart
+    _chart = None
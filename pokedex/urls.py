@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.urls import path
 from . import views, api
 
+if getattr(settings, "ASYNC_API", False):
+    from . import api_async as api
+
 urlpatterns = [
     path("pokemon/", views.pokemon_list, name="pokemon_list"),
     path("pokemon/<slug:identifier>/", views.pokemon_detail, name="pokemon_detail"),
@@ -8,12 +12,21 @@ urlpatterns = [
     path("coverage/", views.coverage_view, name="coverage"),
     path("average/", views.average_view, name="average"),
     path("evolution/<slug:identifier>/", views.evolution_view, name="evolution"),
+    path("sprites/<int:pokemon_id>/<str:variant>", views.sprite_view, name="sprite"),
     path("api/pokemon/", api.pokemon_index, name="api_pokemon_index"),
+    path("api/pokemon/batch/", api.batch_api, name="api_pokemon_batch"),
     path("api/pokemon/<slug:identifier>/", api.pokemon_detail, name="api_pokemon_detail"),
+    path("api/pokemon/<slug:identifier>/similar/", api.similar_api, name="api_similar"),
     path("api/compare/", api.compare_api, name="api_compare"),
     path("api/types/", api.types_api, name="api_types"),
     path("api/abilities/", api.abilities_api, name="api_abilities"),
     path("api/evolution/<slug:identifier>/", api.evolution_api, name="api_evolution"),
     path("api/coverage/", api.coverage_api, name="api_coverage"),
     path("api/average/", api.average_api, name="api_average"),
+    path("api/typechart/", api.typechart_api, name="api_typechart"),
+    path("api/teams/", api.teams_api, name="api_teams"),
+    path("api/export/", api.export_api, name="api_export"),
+    path("api/upstream/", api.upstream_api, name="api_upstream"),
+    path("metrics", api.metrics_view, name="metrics"),
+    path("ready", api.ready_view, name="ready"),
 ]
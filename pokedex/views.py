@@ -1,67 +1,79 @@
-from django.shortcuts import render, redirect
+from functools import partial
+from django.shortcuts import redirect
 from django.conf import settings
-from . import services
+from django.http import FileResponse, Http404
+from django.template.loader import render_to_string
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from . import fragments, search, services, sprites, warmup
+from .metrics import render
+from .response_cache import cache_response
 
+def _filter_lists(type_name, ability):
+    return {
+        "types": services.get_types().get("results", []),
+        "abilities": services.get_all_abilities(),
+        "type_selected": type_name, "ability_selected": ability,
+    }
+
+@cache_response
 def pokemon_list(request):
     error = None
-    try:
-        types = services.get_types().get("results", [])
-        abilities = services.get_all_abilities()
-    except Exception as e:
-        types, abilities = [], []
-        error = f"Failed to load filter lists: {e}"
-
-    q = request.GET.get("q")
+    # Normalized like the response-cache key, so a cached page never echoes
+    # another request's spelling of the query.
+    q = request.GET.get("q", "").strip().lower()
     type_name = request.GET.get("type")
     ability = request.GET.get("ability")
+    match = request.GET.get("match")
+    if match not in search.MODES:
+        match = "substring"
     page = int(request.GET.get("page", "1"))
     page_size = int(request.GET.get("page_size", settings.PAGE_SIZE))
 
+    # The dropdowns are a cached fragment; the lists load only on a miss.
     try:
-        if type_name:
-            data = services.filter_pokemon_by_type(type_name, page=page, page_size=page_size)
-            results = data["results"]; total = data["count"]
-        elif ability:
-            data = services.filter_pokemon_by_ability(ability, page=page, page_size=page_size)
-            results = data["results"]; total = data["count"]
-        elif q:
-            data = services.search_pokemon(q, page=page, page_size=page_size)
-            results = data["results"]; total = data["count"]
-        else:
-            offset = (page-1) * page_size
-            data = services.list_pokemon(offset=offset, limit=page_size)
-            total = data.get("count", 0)
-            results = []
-            for item in data.get("results", []):
-                try:
-                    results.append(services.get_pokemon(item["name"]))
-                except Exception:
-                    pass
+        filters_html = fragments.render("filters", [type_name or "", ability or ""], "pokedex/_filters.html",
+                                        partial(_filter_lists, type_name or "", ability or ""))
+    except Exception as e:
+        filters_html = render_to_string("pokedex/_filters.html", {"types": [], "abilities": []})
+        error = f"Failed to load filter lists: {e}"
+
+    try:
+        filters = {"type_name": type_name, "ability_name": ability, "q": q, "mode": match}
+        data = services.find_pokemon(offset=(page - 1) * page_size, limit=page_size, **filters)
+        results, total = data["results"], data["count"]
         has_next = page * page_size < total
         has_prev = page > 1
+        sprites.prefetch(results, partial(services.find_pokemon, offset=page * page_size, limit=page_size,
+                                          **filters) if has_next else None)
     except services.PokeAPIError as e:
         error = str(e)
         results, total, has_next, has_prev = [], 0, False, False
 
-    return render(request, "pokedex/list.html", {
-        "types": types,
-        "abilities": abilities,
+    response = render(request, "pokedex/list.html", {
+        "filters_html": filters_html,
         "pokemon_list": results,
         "page": page, "page_size": page_size,
         "has_next": has_next, "has_prev": has_prev,
-        "q": q or "", "type_selected": type_name or "", "ability_selected": ability or "",
+        "q": q, "type_selected": type_name or "", "ability_selected": ability or "",
+        "match": match,
         "total": total, "error": error,
     })
+    if error:
+        add_never_cache_headers(response)
+    return response
 
+@warmup.tracks_popularity
 def pokemon_detail(request, identifier):
-    error = None
+    # Error pages go out as 404/500 so tracks_popularity skips unknown names.
+    error, status = None, 200
     try:
-        pokemon = services.get_pokemon(identifier)
+        pokemon = services.get_card(identifier)
         species = services.get_pokemon_species(identifier)
         evolution_names = services.evo_chain_names(services.get_evolution_chain_by_pokemon(identifier))
     except Exception as e:
         pokemon, species, evolution_names = None, None, []
         error = f"Could not load Pokémon: {e}"
+        status = 404 if isinstance(e, services.PokeAPIError) else 500
 
     if request.GET.get("compare_with"):
         other = request.GET["compare_with"].strip()
@@ -70,7 +82,7 @@ def pokemon_detail(request, identifier):
 
     return render(request, "pokedex/detail.html", {
         "pokemon": pokemon, "species": species, "evolution_names": evolution_names, "error": error
-    })
+    }, status=status)
 
 # def compare_view(request):
 #     a = request.GET.get("a", "").strip() or "pikachu"
@@ -89,11 +101,11 @@ def compare_view(request):
 
     error = None
     try:
-        a = services.get_pokemon(a_name)
+        a = services.get_card(a_name)
     except Exception as e:
         a, error = None, f"Couldn't load {a_name}: {e}"
     try:
-        b = services.get_pokemon(b_name)
+        b = services.get_card(b_name)
     except Exception as e:
         b = None
         error = (error + " | " if error else "") + f"Couldn't load {b_name}: {e}"
@@ -131,7 +143,21 @@ def average_view(request):
 
 def evolution_view(request, identifier):
     try:
-        evo = services.get_evolution_chain_by_pokemon(identifier)
+        chain = services.get_evolution_chain_by_pokemon(identifier)
+        evo = chain.as_dict() if chain else None
     except Exception as e:
         evo = {"error": str(e)}
     return render(request, "pokedex/evolution.html", {"evo": evo})
+
+def sprite_view(request, pokemon_id, variant):
+    # First request for a sprite file in this worker; sprites.ensure hands it
+    # to WhiteNoise, which serves the later ones.
+    try:
+        path = sprites.ensure(pokemon_id, variant)
+    except ValueError:
+        raise Http404("Unknown sprite variant")
+    except services.PokeAPIError:
+        raise Http404("Artwork not available")
+    response = FileResponse(open(path, "rb"), content_type="image/webp" if variant.endswith(".webp") else "image/png")
+    patch_cache_control(response, public=True, max_age=getattr(settings, "SPRITE_MAX_AGE", 31536000), immutable=True)
+    return response
@@ -0,0 +1,188 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connection
+from . import scheduler, search, services
+
+# Cache warm-up for cold starts. `run` prefetches the filter lists, the type
+# chart, the name index, the first list pages and the most requested
+# Pokémon; it backs `manage.py warm_cache` and the optional boot hook in
+# wsgi.py/asgi.py (WARM_ON_STARTUP). Detail views record hits through
+# `tracks_popularity`; counts are merged into POPULARITY_FILE once a minute
+# so they survive restarts and deploys.
+
+log = logging.getLogger(__name__)
+
+_progress = {"state": "idle", "done": 0, "total": 0, "failed": 0, "started": None, "finished": None}
+_progress_lock = threading.Lock()
+
+def progress():
+    with _progress_lock:
+        return dict(_progress)
+
+def is_ready():
+    return progress()["state"] in ("idle", "done")
+
+def _update(**changes):
+    with _progress_lock:
+        _progress.update(changes)
+
+def _step(ok):
+    with _progress_lock:
+        _progress["done"] += 1
+        _progress["failed"] += 0 if ok else 1
+
+# Popularity log
+
+_hits = Counter()
+_hits_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+def _popularity_path():
+    return Path(getattr(settings, "POPULARITY_FILE", settings.BASE_DIR / ".cache" / "popularity.json"))
+
+def load_popularity():
+    try:
+        return Counter(json.loads(_popularity_path().read_text()))
+    except (OSError, ValueError):
+        return Counter()
+
+def flush_popularity():
+    global _flushed_at
+    with _hits_lock:
+        pending = _hits.copy()
+        _hits.clear()
+        _flushed_at = time.monotonic()
+    if not pending:
+        return
+    # Read-merge-replace; concurrent workers may drop a few hits, which is
+    # fine for a ranking.
+    path = _popularity_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        counts = load_popularity() + pending
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(dict(counts.most_common(getattr(settings, "POPULARITY_KEEP", 2000)))))
+        os.replace(tmp, path)
+    except OSError as e:
+        log.warning("Could not write popularity log %s: %s", path, e)
+
+def record_hit(identifier):
+    with _hits_lock:
+        _hits[str(identifier).lower()] += 1
+        due = time.monotonic() - _flushed_at >= getattr(settings, "POPULARITY_FLUSH_INTERVAL", 60)
+    if due:
+        flush_popularity()
+
+atexit.register(flush_popularity)
+
+def tracks_popularity(view):
+    # Outermost on detail views so response-cache hits are counted too.
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, identifier, *args, **kwargs):
+            response = await view(request, identifier, *args, **kwargs)
+            if response.status_code < 400:
+                record_hit(identifier)
+            return response
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, identifier, *args, **kwargs):
+        response = view(request, identifier, *args, **kwargs)
+        if response.status_code < 400:
+            record_hit(identifier)
+        return response
+    return wrapper
+
+# Warm-up
+
+class RateLimiter:
+    # Spaces task starts at least 1/rate seconds apart across threads.
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+def _warm_page(page, page_size):
+    data = services.list_pokemon(offset=(page - 1) * page_size, limit=page_size)
+    services.get_cards([item["name"] for item in data.get("results", [])])
+
+def _warm_detail(identifier):
+    services.get_card(identifier)
+    services.get_pokemon_species(identifier)
+    services.get_evolution_chain_by_pokemon(identifier)
+
+def plan(pages=None, popular=None):
+    pages = getattr(settings, "WARM_PAGES", 3) if pages is None else pages
+    popular = getattr(settings, "WARM_POPULAR", 100) if popular is None else popular
+    page_size = settings.PAGE_SIZE
+    tasks = [
+        ("types", services.get_types),
+        ("abilities", services.get_all_abilities),
+        ("typechart", services.type_chart),
+        ("search-index", lambda: search.get_index(services.all_pokemon_names)),
+    ]
+    tasks += [("similar-index", services.start_stat_index)]
+    tasks += [(f"page {p}", lambda p=p: _warm_page(p, page_size)) for p in range(1, pages + 1)]
+    tasks += [(f"pokemon {name}", lambda name=name: _warm_detail(name))
+              for name, _ in load_popularity().most_common(popular)]
+    return tasks
+
+def run(pages=None, popular=None, concurrency=None, rate=None, report=None):
+    tasks = plan(pages, popular)
+    concurrency = concurrency or getattr(settings, "WARM_CONCURRENCY", 4)
+    limiter = RateLimiter(getattr(settings, "WARM_RATE", 10.0) if rate is None else rate)
+    _update(state="running", done=0, total=len(tasks), failed=0, started=time.time(), finished=None)
+
+    def one(task):
+        name, fn = task
+        limiter.wait()
+        t0 = time.perf_counter()
+        try:
+            with scheduler.priority(scheduler.PREFETCH):
+                fn()
+            ok = True
+        except Exception as e:
+            log.warning("Warm-up step %s failed: %s", name, e)
+            ok = False
+        finally:
+            connection.close()
+        _step(ok)
+        if report:
+            report(name, ok, time.perf_counter() - t0)
+        return ok
+
+    try:
+        # Filter lists and the type chart first: every page needs them.
+        head, rest = tasks[:4], tasks[4:]
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="warmup") as pool:
+            list(pool.map(one, head))
+            list(pool.map(one, rest))
+    finally:
+        _update(state="done", finished=time.time())
+    return progress()
+
+def start_on_boot():
+    # Called from wsgi.py/asgi.py; readiness reports "running" until done.
+    if not getattr(settings, "WARM_ON_STARTUP", False):
+        return
+    _update(state="running")
+    threading.Thread(target=run, name="warmup", daemon=True).start()
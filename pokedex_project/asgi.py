@@ -0,0 +1,7 @@
+import os
+from django.core.asgi import get_asgi_application
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pokedex_project.settings")
+application = get_asgi_application()
+
+from pokedex import warmup  # noqa: E402
+warmup.start_on_boot()
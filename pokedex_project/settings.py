@@ -18,8 +18,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "pokedex.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "pokedex.middleware.StaticFilesMiddleware",
+    "pokedex.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -42,12 +44,24 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "pokedex.fragments.context",
             ],
         },
     },
 ]
+if not DEBUG:
+    # Compile each template once per process (no file checks).
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        ("django.template.loaders.cached.Loader", [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ]),
+    ]
 
 WSGI_APPLICATION = "pokedex_project.wsgi.application"
+ASGI_APPLICATION = "pokedex_project.asgi.application"
+ASYNC_API = os.environ.get("ASYNC_API", "0") == "1"
 
 DATABASES = {
     "default": {
@@ -67,16 +81,95 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+}
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem")
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "pokedex-cache"
+        "BACKEND": CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        "LOCATION": os.environ.get("CACHE_LOCATION") or {
+            "locmem": "pokedex-cache",
+            "file": str(BASE_DIR / ".cache"),
+        }.get(CACHE_BACKEND, ""),
     }
 }
+if CACHE_BACKEND == "memcached":
+    CACHES["default"]["KEY_FUNCTION"] = "pokedex.tiered_cache.hashed_key"
+if CACHE_BACKEND in ("locmem", "file"):
+    CACHES["default"]["OPTIONS"] = {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", "5000"))}
+# Rendered HTML fragments stay in process: keyed by data version, cheap to rebuild.
+CACHES["template_fragments"] = {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    "LOCATION": "pokedex-fragments",
+    "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("FRAGMENT_CACHE_ENTRIES", "5000"))},
+}
+FRAGMENT_CACHE_TTL = int(os.environ.get("FRAGMENT_CACHE_TTL", "3600"))
 
 POKEAPI_BASE_URL = os.environ.get("POKEAPI_BASE_URL", "https://pokeapi.co/api/v2")
 PAGE_SIZE = int(os.environ.get("PAGE_SIZE", "24"))
 CACHE_TTL = int(os.environ.get("CACHE_TTL", "3600"))
+CACHE_STALE_TTL = int(os.environ.get("CACHE_STALE_TTL", "86400"))
+CACHE_LRU_SIZE = int(os.environ.get("CACHE_LRU_SIZE", "2048"))
+POKEAPI_CACHE_ALIAS = "default"
+POKEAPI_CONCURRENCY = int(os.environ.get("POKEAPI_CONCURRENCY", "8"))
+SEARCH_INDEX_TTL = int(os.environ.get("SEARCH_INDEX_TTL", os.environ.get("CACHE_TTL", "3600")))
+POKEAPI_POOL_SIZE = int(os.environ.get("POKEAPI_POOL_SIZE", "20"))
+POKEAPI_CONNECT_TIMEOUT = float(os.environ.get("POKEAPI_CONNECT_TIMEOUT", "3.05"))
+POKEAPI_READ_TIMEOUT = float(os.environ.get("POKEAPI_READ_TIMEOUT", "10"))
+POKEAPI_RETRIES = int(os.environ.get("POKEAPI_RETRIES", "2"))
+POKEAPI_RETRY_BACKOFF = float(os.environ.get("POKEAPI_RETRY_BACKOFF", "0.25"))
+POKEAPI_RETRY_MAX_WAIT = float(os.environ.get("POKEAPI_RETRY_MAX_WAIT", "5"))
+POKEAPI_BREAKER_THRESHOLD = int(os.environ.get("POKEAPI_BREAKER_THRESHOLD", "5"))
+POKEAPI_BREAKER_RESET = float(os.environ.get("POKEAPI_BREAKER_RESET", "30"))
+# Upstream token bucket shared by all workers through UPSTREAM_BUCKET_FILE
+# (empty: per process); UPSTREAM_RATE=0 disables the limit.
+UPSTREAM_RATE = float(os.environ.get("UPSTREAM_RATE", "20"))
+UPSTREAM_BURST = int(os.environ.get("UPSTREAM_BURST", "40"))
+UPSTREAM_BUCKET_FILE = os.environ.get("UPSTREAM_BUCKET_FILE", str(BASE_DIR / ".cache" / "upstream.bucket"))
+TEAM_BATCH_LIMIT = int(os.environ.get("TEAM_BATCH_LIMIT", "500"))
+POKEMON_BATCH_LIMIT = int(os.environ.get("POKEMON_BATCH_LIMIT", "500"))
+# Cross-worker lock on the similarity-index build; a build without the local
+# catalog crawls every card under UPSTREAM_RATE.
+STAT_INDEX_BUILD_TIMEOUT = int(os.environ.get("STAT_INDEX_BUILD_TIMEOUT", "1800"))
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "100"))
+EXPORT_LOOKAHEAD = int(os.environ.get("EXPORT_LOOKAHEAD", "2"))
+BULK_TEAM_LIMIT = int(os.environ.get("BULK_TEAM_LIMIT", "10000"))
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_MAX_AGE = int(os.environ.get("RESPONSE_MAX_AGE", "60"))
+WARM_ON_STARTUP = os.environ.get("WARM_ON_STARTUP", "0") == "1"
+WARM_PAGES = int(os.environ.get("WARM_PAGES", "3"))
+WARM_POPULAR = int(os.environ.get("WARM_POPULAR", "100"))
+WARM_CONCURRENCY = int(os.environ.get("WARM_CONCURRENCY", "4"))
+WARM_RATE = float(os.environ.get("WARM_RATE", "10"))
+POPULARITY_FILE = os.environ.get("POPULARITY_FILE", str(BASE_DIR / ".cache" / "popularity.json"))
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", str(BASE_DIR / ".cache" / "pokeapi.snap"))
+SNAPSHOT_STALE_TTL = int(os.environ.get("SNAPSHOT_STALE_TTL", str(30 * 86400)))
+SPRITE_ROOT = Path(os.environ.get("SPRITE_ROOT", str(BASE_DIR / ".cache" / "public")))
+SPRITE_THUMB_SIZES = tuple(int(s) for s in os.environ.get("SPRITE_THUMB_SIZES", "96,192").split(","))
+SPRITE_PREFETCH = os.environ.get("SPRITE_PREFETCH", "1") == "1"
+SPRITE_PREFETCH_JOBS = int(os.environ.get("SPRITE_PREFETCH_JOBS", "8"))
+SPRITE_MAX_AGE = 31536000
+# Sprites already on disk are served straight from WhiteNoise, cached forever.
+WHITENOISE_ROOT = SPRITE_ROOT
+WHITENOISE_IMMUTABLE_FILE_TEST = r"^/sprites/"
+POKEDEX_LOCAL_CATALOG = os.environ.get("LOCAL_CATALOG", "1") == "1"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "pokedex.metrics": {
+            "handlers": ["console"],
+            "level": os.environ.get("METRICS_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
 
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
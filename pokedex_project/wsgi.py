@@ -2,3 +2,6 @@ import os
 from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pokedex_project.settings")
 application = get_wsgi_application()
+
+from pokedex import warmup  # noqa: E402
+warmup.start_on_boot()